@@ -1,12 +1,26 @@
+import time
+IMPORT_START = time.perf_counter()  # Холодный старт считается с первого импорта, numpy и pygame грузятся заметно
+
 import pygame
+import numpy as np
 import json
 import os
-from typing import List, Tuple
+from collections import OrderedDict, deque
+from typing import List, Tuple, NamedTuple
 from tkinter import Tk, filedialog
 import io
-import cairosvg
-from PIL import Image
+import hashlib
 import webbrowser
+import argparse
+import queue
+import sqlite3
+import threading
+from bingo_presets import PresetStore
+from bingo_board import WinDetector, parse_preset
+from bingo_autosave import AutosaveJournal
+from bingo_server import BoardServer, BoardClient, DEFAULT_PORT, valid_record
+from bingo_words import WordPool
+IMPORT_TIME = time.perf_counter() - IMPORT_START
 
 # Константы
 WINDOW_SIZE = (800, 750)
@@ -16,18 +30,655 @@ BACKGROUND_COLOR = (35, 35, 35)
 TEXT_COLOR = (255, 255, 255)
 ACCENT_COLOR = (10, 132, 255)
 SECONDARY_COLOR = (44, 44, 46)
+WIN_COLOR = (48, 209, 88)
+SELECTION_COLOR = (64, 156, 255)
 BUTTON_WIDTH = 120
 BUTTON_HEIGHT = 40
 FONT_SIZE = 16
 TOP_PANEL_HEIGHT = 100  # Высота верхней панели
 LOGO_SIZE = (120, 60)   # Размер логотипа
+MAX_WORD_FONT_SIZE = 30  # Максимальный размер шрифта в клетке
+MIN_WORD_FONT_SIZE = 10  # Минимальный размер шрифта в клетке
+FONT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "font", "helvetica_bold.otf")
+SYSTEM_FONTS = "helveticaneue,helvetica,arial,dejavusans,liberationsans"  # Если рядом нет своего шрифта
+LAYOUT_CACHE_SIZE = 512  # Сколько раскладок текста держать в кэше
+LINE_CACHE_SIZE = 1024   # Сколько отрисованных строк текста держать в кэше
+# Символы, ширины которых считаются заранее для каждого размера; остальные — при первой встрече
+GLYPH_CHARS = "".join(map(chr, range(32, 127))) + "АБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯабвгдеёжзийклмнопрстуфхцчшщъыьэюя«»—–…№"
+FPS = 60                 # Частота кадров, пока идут анимации
+CURSOR_BLINK_INTERVAL = 0.5  # Мигание курсора, секунды
+MESSAGE_DURATION = 2.0       # Время показа сообщения, секунды
+BACKSPACE_DELAY = 10 / 60    # Задержка перед быстрым удалением, секунды
+BACKSPACE_REPEAT = 2 / 60    # Интервал быстрого удаления, секунды
+UNDO_LIMIT = 200             # Сколько шагов отмены помнить для клетки
+MAX_CELL_SIZE = 160          # Предел увеличения клетки
+MIN_TEXT_CELL_SIZE = 24      # В клетках мельче текст не рисуется
+ZOOM_STEP = 1.15             # Множитель увеличения на один щелчок колеса
+PAN_STEP = 60                # Сдвиг поля стрелками, пикселей
+PRESET_IO_EVENT = pygame.event.custom_type()  # Результаты фонового сохранения/загрузки
+NETWORK_EVENT = pygame.event.custom_type()    # Правки общего поля, пришедшие по сети
+AUTOSAVE_EVENT = pygame.event.custom_type()   # Сбой записи автосохранения в фоновом потоке
+SVG_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "svg_cache")
+AUTOSAVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "autosave")
+LIBRARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "presets.db")
+TRACE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "traces")
+TRACE_SECONDS = 10           # Сколько последних секунд хранит профайлер
+TRACE_MAX_SPANS = 500000     # Предел числа замеров в памяти
+PROFILER_GRAPH_FRAMES = 120  # Кадров на графике HUD
+HUD_SIZE = (280, 140)
+HUD_REFRESH = 0.25           # Обновление HUD без анимаций, секунды
+PROFILED_PHASES = ("wait", "handle_events", "update", "draw")
+PROFILED_METHODS = ("draw_word", "render_cell", "layout_text", "draw_region")
+PARTICLE_CAPACITY = 4096     # Начальный размер массивов частиц
+PARTICLE_LIMIT = 50000       # Больше частиц одновременно не бывает
+PARTICLE_FADE = 0.3          # Доля жизни частицы, за которую она гаснет
+MAX_PARTICLE_STEP = 0.1      # Предел шага моделирования после долгой паузы, секунды
+CELEBRATION_PARTICLES = 1500 # Частиц на одну собранную линию
+CELEBRATION_GRAVITY = 900    # Пикселей в секунду за секунду
+MIN_SUGGEST_CHARS = 2        # С какой длины текста в клетке показывать подсказки
+SUGGESTION_WIDTH = 260
+CONFETTI_COLORS = [(255, 69, 58), (255, 214, 10), (48, 209, 88), (10, 132, 255), (191, 90, 242), (255, 255, 255)]
 
 def svg_to_pygame_surface(svg_code, width, height):
+    # Растеризованные SVG хранятся на диске, ключ — хэш исходника и размера
+    key = hashlib.sha256(f"{width}x{height}:{svg_code}".encode("utf-8")).hexdigest()
+    cache_path = os.path.join(SVG_CACHE_DIR, key + ".png")
+    if os.path.exists(cache_path):
+        try:
+            return pygame.image.load(cache_path)
+        except pygame.error:
+            pass  # Битый файл в кэше — растеризуем заново
+
+    import cairosvg  # Тяжелый импорт, нужен только при промахе кэша
     png_data = cairosvg.svg2png(bytestring=svg_code, output_width=width, output_height=height)
+    try:
+        os.makedirs(SVG_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(png_data)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # Без кэша тоже можно работать
     return pygame.image.load(io.BytesIO(png_data))
 
-class BingoGame:
+class TextLayout(NamedTuple):
+    font_size: int
+    lines: List[str]
+    offsets: List[Tuple[int, int]]  # центр каждой строки относительно левого верхнего угла клетки
+    widths: List[int]
+    line_height: int
+
+class LayoutCache:
+    # LRU-кэш раскладок текста по ключу (текст, размер клетки, шрифт)
+    def __init__(self, max_entries=LAYOUT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.cell_size = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        layout = self.entries.get(key)
+        if layout is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return layout
+
+    def put(self, key, layout):
+        self.entries[key] = layout
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, cell_size):
+        # Раскладки для старого размера клетки больше не пригодятся
+        if cell_size != self.cell_size:
+            self.entries.clear()
+            self.cell_size = cell_size
+
+    def clear(self):
+        self.entries.clear()
+
+class FontManager:
+    # Один шрифт на всю игру: файл ищется один раз, все размеры создаются заранее,
+    # ширины символов лежат в таблицах, готовые строки — в LRU-кэше поверхностей
+    def __init__(self):
+        self.path = self.resolve()
+        self.fonts = {}
+        self.advances = {}
+        self.lines = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def resolve():
+        if os.path.exists(FONT_FILE):
+            return FONT_FILE
+        try:
+            return pygame.font.match_font(SYSTEM_FONTS, bold=True)
+        except Exception:
+            return None  # Встроенный шрифт pygame
+
+    def get(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = pygame.font.Font(self.path, size)
+            self.fonts[size] = font
+        return font
+
+    def preload(self, sizes):
+        for size in sizes:
+            self.glyph_advances(size)
+
+    def glyph_advances(self, size):
+        advances = self.advances.get(size)
+        if advances is None:
+            # Одна строка метрик на весь набор символов; у отсутствующих глифов метрик нет
+            font = self.get(size)
+            advances = {char: metrics[4] for char, metrics in zip(GLYPH_CHARS, font.metrics(GLYPH_CHARS)) if metrics}
+            self.advances[size] = advances
+        return advances
+
+    def measure(self, text, size):
+        # Ширина строки как сумма ширин символов, без вызова font.size; кернинг не учитывается,
+        # поэтому результат бывает на пару пикселей больше настоящего
+        advances = self.glyph_advances(size)
+        try:
+            return sum(map(advances.__getitem__, text))
+        except KeyError:
+            font = self.get(size)
+            for char in set(text) - advances.keys():
+                advances[char] = font.size(char)[0]
+            return sum(map(advances.__getitem__, text))
+
+    def render(self, text, size, color=TEXT_COLOR):
+        key = (text, size, color)
+        surface = self.lines.get(key)
+        if surface is not None:
+            self.lines.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self.get(size).render(text, True, color)
+        self.lines[key] = surface
+        if len(self.lines) > LINE_CACHE_SIZE:
+            self.lines.popitem(last=False)
+        return surface
+
+class GapBuffer:
+    # Текст с «дырой» у курсора: вставка и удаление рядом с курсором не двигают весь текст
+    def __init__(self, text='', capacity=16):
+        self.buffer = list(text) + [''] * capacity
+        self.gap_start = len(text)
+        self.gap_end = len(self.buffer)
+        self.cached_text = text
+
+    def __len__(self):
+        return len(self.buffer) - (self.gap_end - self.gap_start)
+
+    def move_gap(self, pos):
+        if pos < self.gap_start:
+            count = self.gap_start - pos
+            self.buffer[self.gap_end - count:self.gap_end] = self.buffer[pos:self.gap_start]
+            self.gap_start = pos
+            self.gap_end -= count
+        elif pos > self.gap_start:
+            count = pos - self.gap_start
+            self.buffer[self.gap_start:pos] = self.buffer[self.gap_end:self.gap_end + count]
+            self.gap_start = pos
+            self.gap_end += count
+
+    def insert(self, pos, text):
+        if not text:
+            return
+        self.move_gap(pos)
+        if self.gap_end - self.gap_start < len(text):
+            # Дыра растет как минимум вдвое, поэтому вставка O(1) в среднем на символ
+            grow = max(len(text), len(self.buffer))
+            self.buffer[self.gap_end:self.gap_end] = [''] * grow
+            self.gap_end += grow
+        self.buffer[self.gap_start:self.gap_start + len(text)] = text
+        self.gap_start += len(text)
+        self.cached_text = None
+
+    def delete(self, start, end):
+        if end <= start:
+            return ''
+        self.move_gap(start)
+        removed = ''.join(self.buffer[self.gap_end:self.gap_end + end - start])
+        self.gap_end += end - start
+        self.cached_text = None
+        return removed
+
+    def slice(self, start, end):
+        return self.text()[start:end]
+
+    def text(self):
+        if self.cached_text is None:
+            self.cached_text = ''.join(self.buffer[:self.gap_start]) + ''.join(self.buffer[self.gap_end:])
+        return self.cached_text
+
+class CellEditor:
+    # Редактирование текста одной клетки: курсор, выделение, отмена и повтор
+    def __init__(self, text=''):
+        self.buffer = GapBuffer(text)
+        self.cursor = len(text)
+        self.selection_start = None
+        self.selection_end = None
+        self.undo_log = deque(maxlen=UNDO_LIMIT)  # [начало, удаленный текст, вставленный текст]
+        self.redo_log = []
+        self.merge_typing = False
+
+    def text(self):
+        return self.buffer.text()
+
+    def has_selection(self):
+        return self.selection_start is not None and self.selection_start != self.selection_end
+
+    def selection_range(self):
+        return min(self.selection_start, self.selection_end), max(self.selection_start, self.selection_end)
+
+    def selected_text(self):
+        if not self.has_selection():
+            return ''
+        return self.buffer.slice(*self.selection_range())
+
+    def clear_selection(self):
+        self.selection_start = None
+        self.selection_end = None
+
+    def move(self, pos, select=False):
+        pos = max(0, min(len(self.buffer), pos))
+        if select:
+            if self.selection_start is None:
+                self.selection_start = self.cursor
+            self.selection_end = pos
+        else:
+            self.clear_selection()
+        self.cursor = pos
+        self.merge_typing = False
+
+    def select_all(self):
+        self.selection_start = 0
+        self.selection_end = len(self.buffer)
+        self.cursor = self.selection_end
+        self.merge_typing = False
+
+    def replace(self, start, end, text):
+        removed = self.buffer.delete(start, end)
+        self.buffer.insert(start, text)
+        self.cursor = start + len(text)
+        self.clear_selection()
+        return removed
+
+    def edit(self, start, end, text):
+        removed = self.replace(start, end, text)
+        typing = len(text) == 1 and not removed and not text.isspace()
+        last = self.undo_log[-1] if self.undo_log else None
+        # Набор слова подряд отменяется одним шагом
+        if typing and self.merge_typing and last is not None and last[0] + len(last[2]) == start:
+            last[2] += text
+        else:
+            self.undo_log.append([start, removed, text])
+        self.merge_typing = typing
+        self.redo_log.clear()
+
+    def insert(self, text):
+        if self.has_selection():
+            self.edit(*self.selection_range(), text)
+        elif text:
+            self.edit(self.cursor, self.cursor, text)
+
+    def backspace(self):
+        if self.has_selection():
+            self.edit(*self.selection_range(), '')
+        elif self.cursor > 0:
+            self.edit(self.cursor - 1, self.cursor, '')
+        else:
+            return False
+        return True
+
+    def delete(self):
+        if self.has_selection():
+            self.edit(*self.selection_range(), '')
+        elif self.cursor < len(self.buffer):
+            self.edit(self.cursor, self.cursor + 1, '')
+        else:
+            return False
+        return True
+
+    def undo(self):
+        if not self.undo_log:
+            return False
+        start, removed, inserted = self.undo_log.pop()
+        self.replace(start, start + len(inserted), removed)
+        self.redo_log.append([start, removed, inserted])
+        self.merge_typing = False
+        return True
+
+    def redo(self):
+        if not self.redo_log:
+            return False
+        start, removed, inserted = self.redo_log.pop()
+        self.replace(start, start + len(removed), inserted)
+        self.undo_log.append([start, removed, inserted])
+        self.merge_typing = False
+        return True
+
+class PresetWorker:
+    # Фоновый поток для диалогов и чтения/записи пресетов.
+    # Один скрытый корень Tk живет в этом потоке все время работы;
+    # результаты возвращаются в главный цикл событиями PRESET_IO_EVENT
     def __init__(self):
+        self.jobs = queue.Queue()
+        self.thread = None
+        self.root = None
+        self.busy = False
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="preset-io", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        if self.thread is not None:
+            self.jobs.put(None)
+            self.thread.join(timeout=1)
+            self.thread = None
+
+    def submit(self, job, *args, exclusive=True):
+        # exclusive — диалог: пока он открыт, второй не запускается.
+        # Фоновые задачи (пул слов) очередь не занимают и сохранению/загрузке не мешают
+        if exclusive and self.busy:
+            return False
+        if exclusive:
+            self.busy = True
+        self.start()
+        self.jobs.put((job, args, exclusive))
+        return True
+
+    def run(self):
+        while True:
+            item = self.jobs.get()
+            if item is None:
+                break
+            job, args, exclusive = item
+            try:
+                result = job(*args)
+            except Exception as e:
+                result = {"action": "error", "error": str(e)}
+            if exclusive:
+                self.busy = False
+            pygame.event.post(pygame.event.Event(PRESET_IO_EVENT, result))
+        if self.root is not None:
+            self.root.destroy()
+            self.root = None
+
+    def dialog_root(self):
+        if self.root is None:
+            self.root = Tk()
+            self.root.withdraw()
+        return self.root
+
+    def save(self, preset, initial_file):
+        file_path = filedialog.asksaveasfilename(
+            parent=self.dialog_root(),
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            initialfile=initial_file
+        )
+        if not file_path:
+            return {"action": "save_cancelled"}
+        try:
+            tmp_path = file_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(preset, f)
+            os.replace(tmp_path, file_path)
+        except OSError as e:
+            return {"action": "save_error", "error": str(e)}
+        return {"action": "saved", "path": file_path, "preset": preset}
+
+    def load(self):
+        file_path = filedialog.askopenfilename(
+            parent=self.dialog_root(),
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return {"action": "load_cancelled"}
+        try:
+            with open(file_path, "r") as f:
+                grid_size, board, marked_cells = parse_preset(json.load(f))
+        except Exception as e:
+            return {"action": "error", "error": str(e)}
+        return {"action": "loaded", "path": file_path, "grid_size": grid_size,
+                "board": board, "marked_cells": marked_cells}
+
+class ParticleSystem:
+    # Частицы хранятся структурой массивов; живые всегда занимают первые count элементов,
+    # поэтому шаг, удаление и отрисовка — векторные операции без цикла по частицам
+    FIELDS = ("pos", "vel", "age", "life", "gravity", "color", "size")
+
+    def __init__(self, capacity=PARTICLE_CAPACITY):
+        self.count = 0
+        self.pos = np.zeros((capacity, 2), np.float32)
+        self.vel = np.zeros((capacity, 2), np.float32)
+        self.age = np.zeros(capacity, np.float32)
+        self.life = np.ones(capacity, np.float32)
+        self.gravity = np.zeros(capacity, np.float32)
+        self.color = np.zeros((capacity, 3), np.uint8)
+        self.size = np.zeros(capacity, np.int32)
+
+    def __len__(self):
+        return self.count
+
+    def reserve(self, extra):
+        capacity = len(self.age)
+        needed = min(self.count + extra, PARTICLE_LIMIT)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in self.FIELDS:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def emit(self, pos, vel, life, color, size, gravity=0.0):
+        # Все аргументы — массивы по числу новых частиц или скаляры
+        pos = np.asarray(pos, np.float32).reshape(-1, 2)
+        self.reserve(len(pos))
+        k = min(len(pos), PARTICLE_LIMIT - self.count)
+        if k <= 0:
+            return
+        new = slice(self.count, self.count + k)
+        self.pos[new] = pos[:k]
+        self.vel[new] = np.broadcast_to(np.asarray(vel, np.float32), (len(pos), 2))[:k]
+        self.life[new] = np.broadcast_to(np.asarray(life, np.float32), len(pos))[:k]
+        self.color[new] = np.broadcast_to(np.asarray(color, np.uint8), (len(pos), 3))[:k]
+        self.size[new] = np.broadcast_to(np.asarray(size, np.int32), len(pos))[:k]
+        self.gravity[new] = np.broadcast_to(np.asarray(gravity, np.float32), len(pos))[:k]
+        self.age[new] = 0
+        self.count += k
+
+    def step(self, dt):
+        n = self.count
+        if not n:
+            return
+        self.vel[:n, 1] += self.gravity[:n] * dt
+        self.pos[:n] += self.vel[:n] * dt
+        self.age[:n] += dt
+        dead = np.flatnonzero(self.age[:n] >= self.life[:n])
+        if len(dead):
+            self.remove(dead)
+
+    def remove(self, dead):
+        # Удаление с переносом с конца: дыры среди оставшихся заполняются живыми частицами из хвоста
+        new_count = self.count - len(dead)
+        holes = dead[dead < new_count]
+        if len(holes):
+            tail_alive = np.ones(self.count - new_count, bool)
+            tail_alive[dead[dead >= new_count] - new_count] = False
+            fillers = np.flatnonzero(tail_alive) + new_count
+            for name in self.FIELDS:
+                array = getattr(self, name)
+                array[holes] = array[fillers]
+        self.count = new_count
+
+    def clear(self):
+        self.count = 0
+
+    def bounds(self):
+        if not self.count:
+            return None
+        pos = self.pos[:self.count]
+        margin = int(self.size[:self.count].max()) + 1
+        left, top = pos.min(axis=0)
+        right, bottom = pos.max(axis=0)
+        return pygame.Rect(int(left) - margin, int(top) - margin, int(right - left) + 2 * margin, int(bottom - top) + 2 * margin)
+
+    def draw(self, surface, clip):
+        # Частица — квадрат size x size; рисуется записью в пиксели поверхности сразу для всех частиц
+        n = self.count
+        clip = clip.clip(surface.get_rect())
+        if not n or not clip.width or not clip.height:
+            return
+        size = self.size[:n]
+        left = self.pos[:n, 0].astype(np.int32) - size // 2
+        top = self.pos[:n, 1].astype(np.int32) - size // 2
+        visible = np.flatnonzero((left < clip.right) & (left + size > clip.left) & (top < clip.bottom) & (top + size > clip.top))
+        if not len(visible):
+            return
+        left, top, size = left[visible], top[visible], size[visible]
+        fade = np.clip((self.life[visible] - self.age[visible]) / (self.life[visible] * PARTICLE_FADE), 0, 1)
+        rgb = (self.color[visible] * fade[:, None]).astype(np.uint32)
+        # Цвета сразу в формате пикселя поверхности, чтобы писать одно число вместо трех каналов
+        shifts, losses = surface.get_shifts(), surface.get_losses()
+        colors = np.full(len(visible), surface.get_masks()[3], np.uint32)
+        for channel in range(3):
+            colors |= (rgb[:, channel] >> losses[channel]) << shifts[channel]
+        inside = (left >= clip.left) & (left + size <= clip.right) & (top >= clip.top) & (top + size <= clip.bottom)
+
+        if surface.get_bytesize() != 4:
+            # Прямой доступ к пикселям только для 32-битных поверхностей
+            old_clip = surface.get_clip()
+            surface.set_clip(clip)
+            for x, y, square, color in zip(left.tolist(), top.tolist(), size.tolist(), rgb.tolist()):
+                surface.fill(color, (x, y, square, square))
+            surface.set_clip(old_clip)
+            return
+
+        pixels = pygame.surfarray.pixels2d(surface)
+        try:
+            for square in np.unique(size):
+                group = size == square
+                for clipped in (False, True):
+                    # Частицы на краю области обрезаются, остальные пишутся без проверок
+                    selected = np.flatnonzero(group & (inside != clipped))
+                    if not len(selected):
+                        continue
+                    xs, ys, cs = left[selected], top[selected], colors[selected]
+                    for dx in range(square):
+                        for dy in range(square):
+                            if clipped:
+                                keep = (xs + dx >= clip.left) & (xs + dx < clip.right) & (ys + dy >= clip.top) & (ys + dy < clip.bottom)
+                                pixels[xs[keep] + dx, ys[keep] + dy] = cs[keep]
+                            else:
+                                pixels[xs + dx, ys + dy] = cs
+        finally:
+            del pixels
+
+class FrameProfiler:
+    # Замеры фаз главного цикла и отдельных методов. Пока профайлер выключен, игра его не вызывает:
+    # методы подменяются обертками с замером только на время профилирования
+    def __init__(self, trace_seconds=TRACE_SECONDS):
+        self.enabled = False
+        self.trace_seconds = trace_seconds
+        self.origin = time.perf_counter()
+        self.spans = deque(maxlen=TRACE_MAX_SPANS)  # (имя, начало, длительность) в секундах perf_counter
+        self.frame_starts = deque(maxlen=PROFILER_GRAPH_FRAMES)
+        self.frame_times = deque(maxlen=PROFILER_GRAPH_FRAMES)
+        self.phase_times = {phase: deque(maxlen=PROFILER_GRAPH_FRAMES) for phase in PROFILED_PHASES}
+        self.calls = {}
+
+    def reset(self):
+        self.spans.clear()
+        self.frame_starts.clear()
+        self.frame_times.clear()
+        for times in self.phase_times.values():
+            times.clear()
+        self.calls = {}
+
+    def wrap(self, name, func):
+        spans = self.spans
+        calls = self.calls
+        calls.setdefault(name, 0)
+        def timed(*args, **kwargs):
+            calls[name] += 1
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                spans.append((name, start, time.perf_counter() - start))
+        return timed
+
+    def count(self, name, func):
+        calls = self.calls
+        calls.setdefault(name, 0)
+        def counted(*args):
+            calls[name] += 1
+            return func(*args)
+        return counted
+
+    def end_frame(self, marks):
+        # marks — моменты начала каждой фазы и конец кадра
+        for phase, start, end in zip(PROFILED_PHASES, marks, marks[1:]):
+            self.spans.append((phase, start, end - start))
+            self.phase_times[phase].append(end - start)
+        self.frame_starts.append(marks[1])
+        self.frame_times.append(marks[-1] - marks[1])
+        limit = marks[-1] - self.trace_seconds
+        spans = self.spans
+        while spans and spans[0][1] < limit:
+            spans.popleft()
+
+    def fps(self):
+        if len(self.frame_starts) < 2:
+            return 0.0
+        elapsed = self.frame_starts[-1] - self.frame_starts[0]
+        return (len(self.frame_starts) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def mean_ms(self, phase):
+        times = self.phase_times[phase]
+        return sum(times) / len(times) * 1000 if times else 0.0
+
+    def trace_events(self, spans):
+        # Формат Trace Event (chrome://tracing, Perfetto): полные события "X" в микросекундах
+        return [{
+            "name": name,
+            "cat": "frame" if name in PROFILED_PHASES else "call",
+            "ph": "X",
+            "ts": round((start - self.origin) * 1e6, 1),
+            "dur": round(duration * 1e6, 1),
+            "pid": 1,
+            "tid": 1
+        } for name, start, duration in spans]
+
+    def export(self, path):
+        # Копия замеров делается сразу, преобразование и запись — в фоновом потоке
+        spans = list(self.spans)
+        def write():
+            events = self.trace_events(spans)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        threading.Thread(target=write, name="trace-export", daemon=True).start()
+
+class BingoGame:
+    def __init__(self, autosave=True, host=None, connect=None, words=None):
+        start_time = time.perf_counter()
         pygame.init()
         self.width, self.height = WINDOW_SIZE
         self.screen = pygame.display.set_mode(WINDOW_SIZE, pygame.RESIZABLE)
@@ -37,50 +688,94 @@ class BingoGame:
         self.running = True
         self.font_size = FONT_SIZE
 
-        self.cursor_position = 0
+        self.editor = CellEditor()
+        self.clipboard = ''
         self.cursor_visible = True
-        self.cursor_timer = 0
-
-        self.selection_start = None
-        self.selection_end = None
+        self.cursor_blink_at = 0
+        self.input_sync_at = None  # Когда текст из буфера редактора уйдет в поле, автосохранение и сеть
 
         self.backspace_held = False
-        self.backspace_timer = 0
+        self.backspace_repeat_at = 0
 
-        self.available_sizes = [3, 4, 5, 6, 7]
+        self.available_sizes = [3, 4, 5, 6, 7, 20, 30, 50]
         self.current_size_index = 2
         self.grid_size = self.available_sizes[self.current_size_index]
         self.cell_size = CELL_SIZE
         self.grid_offset = (MARGIN, MARGIN)
 
+        # Область просмотра поля: масштаб относительно «все поле в окне» и сдвиг
+        self.zoom = 1.0
+        self.pan = [0, 0]
+        self.grid_area = pygame.Rect(0, TOP_PANEL_HEIGHT, WINDOW_SIZE[0], WINDOW_SIZE[1] - TOP_PANEL_HEIGHT - 50)
+        self.panning = False
+
         self.button_rect = pygame.Rect(0, 0, BUTTON_WIDTH, BUTTON_HEIGHT)
         self.size_button_rect = pygame.Rect(0, 0, BUTTON_WIDTH, BUTTON_HEIGHT)
         self.save_button_rect = pygame.Rect(0, 0, BUTTON_WIDTH, BUTTON_HEIGHT)
         self.load_button_rect = pygame.Rect(0, 0, BUTTON_WIDTH, BUTTON_HEIGHT)
 
         self.input_text = ''
-        self.font = pygame.font.Font(None, FONT_SIZE)
-        self.title_font = pygame.font.Font(None, 48)
-        
+        self.word_pool = None
+        self.suggestions = []
+        self.suggestion_selected = 0
+        self.suggestion_rect = pygame.Rect(0, 0, 0, 0)
+
+        # Все шрифты — из одного менеджера; размеры текста клеток готовятся сразу
+        pygame.font.init()
+        self.fonts = FontManager()
+        self.fonts.preload(range(MIN_WORD_FONT_SIZE, MAX_WORD_FONT_SIZE + 1))
+        self.font = self.fonts.get(FONT_SIZE)
+        self.title_font = self.fonts.get(48)
+        self.author_font = self.fonts.get(12)
+
         self.board = self.generate_board()
         self.marked_cells = set()
+        self.win_detector = WinDetector(self.available_sizes)
+        self.marked_mask = 0
+        self.win_lines = []
+        self.win_mask = 0
         self.message = ""
-        self.message_timer = 0
+        self.message_until = 0
         self.input_active = False
         self.editing_cell = None
         self.selected_cell = None
         self.message_rect = pygame.Rect(0, 0, self.width, 30)
+        self.preset_worker = PresetWorker()
 
-        self.font_cache = {}
-        pygame.font.init()
-        FONT_PATH = "C:/Users/game4/Desktop/BINGO/font/helvetica_bold.otf"
-        self.font = pygame.font.Font(FONT_PATH, FONT_SIZE)
-        self.title_font = pygame.font.Font(FONT_PATH, 48)
-        self.author_font = pygame.font.Font(FONT_PATH, 12)
+        # Библиотека пресетов и окно поиска по ней
+        self.library = None
+        self.browser_open = False
+        self.browser_query = ''
+        self.browser_size = None
+        self.browser_results = []
+        self.browser_selected = 0
+        self.browser_rect = pygame.Rect(0, 0, 0, 0)
+
+        self.layout_cache = LayoutCache()
+        self.author_surface = self.author_font.render("Made by serezha168", True, TEXT_COLOR)
         self.author_rect = None
 
-        self.animations = []
-        self.animation_speed = 5
+        # Области экрана, которые нужно перерисовать в следующем кадре
+        self.dirty_rects = []
+        self.full_redraw = True
+
+        # Готовые изображения клеток, перерисовываются только при изменении клетки
+        self.cell_surfaces = {}
+
+        # Анимации и эффекты победы — частицы, шаг по реальному времени
+        self.particles = ParticleSystem()
+        self.particles_time = time.monotonic()
+        self.rng = np.random.default_rng()
+
+        # Ждать событий вместо постоянной отрисовки, когда ничего не анимируется
+        self.idle_mode = True
+
+        # Профайлер кадров и его HUD (F3), выгрузка трассы — F4
+        self.profiler = FrameProfiler()
+        self.hud_visible = False
+        self.hud_rect = pygame.Rect(0, 0, *HUD_SIZE)
+        self.hud_font = self.fonts.get(13)
+        self.profile_baseline = (0, 0, 0, 0)
 
         # SVG-элементы
         self.logo_svg = '''<svg width="59" height="13" viewBox="0 0 59 13" fill="none" xmlns="http://www.w3.org/2000/svg">
@@ -125,6 +820,9 @@ class BingoGame:
             size: svg_to_pygame_surface(svg, BUTTON_WIDTH, BUTTON_HEIGHT)
             for size, svg in self.size_buttons_svg.items()
         }
+        for size in self.available_sizes:
+            if size not in self.size_buttons_surfaces:
+                self.size_buttons_surfaces[size] = self.make_size_button(size)
 
         self.current_size_button_surface = self.size_buttons_surfaces[self.grid_size]
         self.save_button_surface = svg_to_pygame_surface(self.save_button_svg, BUTTON_WIDTH, BUTTON_HEIGHT)
@@ -133,21 +831,107 @@ class BingoGame:
         self.adjust_scale()
 
         self.editing_cell = None
-        self.active_input = ''
+
+        # Сеть поднимается после восстановления сессии, но publish() смотрит на эти поля уже в apply_preset
+        self.board_server = None
+        self.board_client = None
+        self.applying_remote = False
+
+        # Восстановление прошлой сессии из автосохранения
+        self.autosave = None
+        if autosave:
+            journal = AutosaveJournal(AUTOSAVE_DIR, on_error=self.autosave_failed)
+            state = journal.restore()
+            if state is not None:
+                try:
+                    self.apply_preset(*parse_preset(state))
+                    self.set_message("Восстановлена прошлая сессия")
+                except (ValueError, TypeError):
+                    pass
+            try:
+                journal.start(self.grid_size, self.board, self.marked_cells)
+                self.autosave = journal
+            except OSError as e:
+                # Например, папка с игрой доступна только для чтения
+                self.set_message(f"Автосохранение отключено: {e}")
+
+        # Общее поле по сети: ведущий экран держит сервер, остальные подключаются к нему
+        if host is not None:
+            self.board_server = BoardServer(self.grid_size, self.board, self.marked_cells, *host, on_remote=self.post_remote)
+            self.board_server.run_in_thread()
+            self.set_message(f"Поле доступно по сети, порт {self.board_server.port}")
+        elif connect is not None:
+            self.board_client = BoardClient(*connect, on_record=self.post_remote)
+            self.board_client.start()
+
+        # Пул слов для подсказок и случайного заполнения грузится в фоне
+        if words:
+            self.preset_worker.submit(load_words, words, exclusive=False)
+
+        # Время холодного старта, секунды: импорт модулей плюс __init__
+        self.init_time = time.perf_counter() - start_time
+        self.startup_time = IMPORT_TIME + self.init_time
+
+    def make_size_button(self, size):
+        # Кнопка размера для полей без готового SVG
+        surface = pygame.Surface((BUTTON_WIDTH, BUTTON_HEIGHT), pygame.SRCALPHA)
+        pygame.draw.rect(surface, (108, 42, 249), surface.get_rect(), border_radius=BUTTON_HEIGHT * 11 // 30)
+        text = self.font.render(f"{size}x{size}", True, TEXT_COLOR)
+        surface.blit(text, text.get_rect(center=surface.get_rect().center))
+        return surface
 
     def generate_board(self) -> List[List[str]]:
+        # С загруженным пулом новое поле сразу заполняется случайными словами
+        if self.word_pool is not None and len(self.word_pool) >= self.grid_size * self.grid_size:
+            return self.word_pool.random_board(self.grid_size)
         return [['' for _ in range(self.grid_size)] for _ in range(self.grid_size)]
 
-    def handle_events(self):
-        for event in pygame.event.get():
+    def fill_from_pool(self):
+        if self.word_pool is None:
+            self.set_message("Пул слов не загружен (запуск с --pool)")
+            return
+        try:
+            board = self.word_pool.random_board(self.grid_size)
+        except ValueError as e:
+            self.set_message(str(e))
+            return
+        self.apply_preset(self.grid_size, board, set())
+
+    def handle_events(self, events=None):
+        if events is None:
+            events = pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
             elif event.type == pygame.VIDEORESIZE:
                 self.width, self.height = event.size
                 self.screen = pygame.display.set_mode((self.width, self.height), pygame.RESIZABLE)
                 self.adjust_scale()
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.invalidate_all()
+            elif event.type == PRESET_IO_EVENT:
+                self.handle_preset_event(event)
+            elif event.type == NETWORK_EVENT:
+                self.apply_remote(event.record)
+            elif event.type == AUTOSAVE_EVENT:
+                self.autosave = None
+                self.set_message(f"Автосохранение отключено: {event.error}")
+            elif event.type == pygame.MOUSEWHEEL:
+                if not self.browser_open:
+                    self.zoom_at(pygame.mouse.get_pos(), ZOOM_STEP ** event.y)
+            elif event.type == pygame.MOUSEMOTION:
+                if self.panning:
+                    self.pan_view(*event.rel)
+            elif event.type == pygame.MOUSEBUTTONUP:
+                if event.button == 2:
+                    self.panning = False
             elif event.type == pygame.MOUSEBUTTONDOWN:
-                if event.button == 1:  # Левая кнопка мыши
+                if self.browser_open:
+                    if event.button == 1:
+                        self.handle_browser_click(event.pos)
+                elif event.button == 2:  # Средняя кнопка — перетаскивание поля
+                    self.panning = True
+                elif event.button == 1:  # Левая кнопка мыши
                     if self.author_rect.collidepoint(event.pos):
                         self.open_link("https://t.me/serezha168")
                     else:
@@ -156,42 +940,28 @@ class BingoGame:
                     self.handle_right_click(event.pos)
                 
             elif event.type == pygame.KEYDOWN:
-                if self.editing_cell is not None:
-                    if event.key == pygame.K_c and pygame.key.get_mods() & pygame.KMOD_CTRL:
-                        self.copy_selected_text()
-                    elif event.key == pygame.K_v and pygame.key.get_mods() & pygame.KMOD_CTRL:
-                        self.paste_text()
-                    elif event.key == pygame.K_x and pygame.key.get_mods() & pygame.KMOD_CTRL:
-                        self.cut_selected_text()
-                    elif event.key == pygame.K_LEFT:
-                        self.cursor_position = max(0, self.cursor_position - 1)
-                    elif event.key == pygame.K_RIGHT:
-                        self.cursor_position = min(len(self.active_input), self.cursor_position + 1)
-                    elif event.key == pygame.K_HOME:
-                        self.cursor_position = 0
-                    elif event.key == pygame.K_END:
-                        self.cursor_position = len(self.active_input)
-                    elif event.key == pygame.K_BACKSPACE:
-                        if self.cursor_position > 0:
-                            self.active_input = (
-                                self.active_input[:self.cursor_position-1] +
-                                self.active_input[self.cursor_position:]
-                            )
-                            self.cursor_position -= 1
-                    elif event.key == pygame.K_DELETE:
-                        if self.cursor_position < len(self.active_input):
-                            self.active_input = (
-                                self.active_input[:self.cursor_position] +
-                                self.active_input[self.cursor_position + 1:]
-                            )
-                    else:
-                        self.active_input = (
-                            self.active_input[:self.cursor_position] +
-                            event.unicode +
-                            self.active_input[self.cursor_position:]
-                        )
-                        self.cursor_position += len(event.unicode)
-                    self.board[self.editing_cell[1]][self.editing_cell[0]] = self.active_input
+                if event.key == pygame.K_F3:
+                    self.toggle_hud()
+                elif event.key == pygame.K_F4:
+                    self.export_trace()
+                elif self.browser_open:
+                    self.handle_browser_key(event)
+                elif self.editing_cell is None and event.key == pygame.K_f and pygame.key.get_mods() & pygame.KMOD_CTRL:
+                    self.open_browser()
+                elif self.editing_cell is None and event.key == pygame.K_s and pygame.key.get_mods() & pygame.KMOD_CTRL:
+                    self.save_to_library()
+                elif self.editing_cell is None and event.key == pygame.K_r and pygame.key.get_mods() & pygame.KMOD_CTRL:
+                    self.fill_from_pool()
+                elif self.editing_cell is not None:
+                    self.handle_edit_key(event)
+                elif event.key in (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN):
+                    dx = {pygame.K_LEFT: PAN_STEP, pygame.K_RIGHT: -PAN_STEP}.get(event.key, 0)
+                    dy = {pygame.K_UP: PAN_STEP, pygame.K_DOWN: -PAN_STEP}.get(event.key, 0)
+                    self.pan_view(dx, dy)
+                elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    self.zoom_at(self.grid_area.center, ZOOM_STEP)
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    self.zoom_at(self.grid_area.center, 1 / ZOOM_STEP)
             elif event.type == pygame.KEYUP:
                 if event.key == pygame.K_BACKSPACE:
                     self.backspace_held = False
@@ -199,22 +969,183 @@ class BingoGame:
         # Обработка зажатой клавиши Backspace
         keys = pygame.key.get_pressed()
         if keys[pygame.K_BACKSPACE]:
+            now = time.monotonic()
             if not self.backspace_held:
                 self.backspace_held = True
-                self.backspace_timer = 0
-            else:
-                self.backspace_timer += 1
-                if self.backspace_timer > 10 and self.backspace_timer % 2 == 0:  # Задержка перед быстрым удалением
-                    if self.cursor_position > 0:
-                        self.active_input = (
-                            self.active_input[:self.cursor_position-1] +
-                            self.active_input[self.cursor_position:]
-                        )
-                        self.cursor_position -= 1
+                self.backspace_repeat_at = now + BACKSPACE_DELAY
+            elif now >= self.backspace_repeat_at:
+                self.backspace_repeat_at = now + BACKSPACE_REPEAT
+                if self.editing_cell is not None and self.editor.backspace():
+                    self.input_changed()
         else:
             self.backspace_held = False
 
+    @property
+    def active_input(self):
+        return self.editor.text()
+
+    @property
+    def cursor_position(self):
+        return self.editor.cursor
+
+    def handle_edit_key(self, event):
+        if self.suggestions and event.key in (pygame.K_UP, pygame.K_DOWN, pygame.K_TAB, pygame.K_RETURN, pygame.K_KP_ENTER, pygame.K_ESCAPE):
+            self.handle_suggestion_key(event)
+            return
+        ctrl = event.mod & pygame.KMOD_CTRL
+        shift = event.mod & pygame.KMOD_SHIFT
+        editor = self.editor
+        if ctrl and event.key == pygame.K_c:
+            self.copy_selected_text()
+        elif ctrl and event.key == pygame.K_v:
+            self.paste_text()
+        elif ctrl and event.key == pygame.K_x:
+            self.cut_selected_text()
+        elif ctrl and event.key == pygame.K_a:
+            editor.select_all()
+            self.mark_cell_dirty(*self.editing_cell)
+        elif ctrl and (event.key == pygame.K_y or (event.key == pygame.K_z and shift)):
+            if editor.redo():
+                self.input_changed()
+        elif ctrl and event.key == pygame.K_z:
+            if editor.undo():
+                self.input_changed()
+        elif event.key in (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_HOME, pygame.K_END):
+            if event.key == pygame.K_LEFT:
+                pos = editor.cursor - 1
+            elif event.key == pygame.K_RIGHT:
+                pos = editor.cursor + 1
+            elif event.key == pygame.K_HOME:
+                pos = 0
+            else:
+                pos = len(editor.buffer)
+            if editor.has_selection() and not shift and event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                # Стрелка без Shift сворачивает выделение к его краю
+                start, end = editor.selection_range()
+                pos = start if event.key == pygame.K_LEFT else end
+            editor.move(pos, select=shift)
+            self.mark_cell_dirty(*self.editing_cell)
+        elif event.key == pygame.K_BACKSPACE:
+            if editor.backspace():
+                self.input_changed()
+        elif event.key == pygame.K_DELETE:
+            if editor.delete():
+                self.input_changed()
+        elif event.unicode and event.unicode.isprintable():
+            editor.insert(event.unicode)
+            self.input_changed()
+
+    def input_changed(self):
+        # Меняется только редактируемая клетка, остальные не перерисовываются.
+        # Строка из буфера здесь не собирается: клетка рисуется из редактора, а в поле,
+        # автосохранение и сеть текст уходит не чаще раза за CURSOR_BLINK_INTERVAL (sync_input)
+        x, y = self.editing_cell
+        now = time.monotonic()
+        if self.input_sync_at is None:
+            self.input_sync_at = now + CURSOR_BLINK_INTERVAL
+        self.cursor_visible = True
+        self.cursor_blink_at = now + CURSOR_BLINK_INTERVAL
+        self.mark_cell_dirty(x, y)
+        self.update_suggestions()
+
+    def sync_input(self):
+        if self.editing_cell is not None and self.input_sync_at is not None:
+            x, y = self.editing_cell
+            self.board[y][x] = self.editor.text()
+            self.publish_cell(x, y)
+        self.input_sync_at = None
+
+    def update_suggestions(self):
+        # Подсказки по началу текста клетки; двоичный поиск по пулу укладывается в доли миллисекунды.
+        # Текст длиннее самого длинного слова пула ни с чем не совпадет — его и не собираем
+        suggestions = []
+        if self.word_pool is not None and MIN_SUGGEST_CHARS <= len(self.editor.buffer) <= self.word_pool.longest:
+            text = self.editor.text()
+            if len(text.strip()) >= MIN_SUGGEST_CHARS:
+                suggestions = [word for word in self.word_pool.suggest(text) if word != text]
+        self.show_suggestions(suggestions)
+
+    def show_suggestions(self, suggestions):
+        self.mark_dirty(self.suggestion_rect)
+        self.suggestions = suggestions
+        self.suggestion_selected = 0
+        if not suggestions:
+            self.suggestion_rect = pygame.Rect(0, 0, 0, 0)
+            return
+        # Список под редактируемой клеткой, а если не помещается — над ней
+        cell = self.cell_rect(*self.editing_cell)
+        row_height = self.font.get_linesize() + 6
+        rect = pygame.Rect(cell.left, cell.bottom + 2, max(cell.width, SUGGESTION_WIDTH), row_height * len(suggestions))
+        if rect.bottom > self.height:
+            rect.bottom = cell.top - 2
+        rect.clamp_ip(self.screen.get_rect())
+        self.suggestion_rect = rect
+        self.mark_dirty(rect)
+
+    def handle_suggestion_key(self, event):
+        if event.key == pygame.K_ESCAPE:
+            self.show_suggestions([])
+            return
+        if event.key in (pygame.K_TAB, pygame.K_RETURN, pygame.K_KP_ENTER):
+            self.accept_suggestion(self.suggestion_selected)
+            return
+        step = 1 if event.key == pygame.K_DOWN else -1
+        self.suggestion_selected = (self.suggestion_selected + step) % len(self.suggestions)
+        self.mark_dirty(self.suggestion_rect)
+
+    def accept_suggestion(self, index):
+        # Замена через редактор, чтобы ее можно было отменить
+        word = self.suggestions[index]
+        self.editor.select_all()
+        self.editor.insert(word)
+        self.input_changed()
+        self.show_suggestions([])
+
+    def draw_suggestions(self):
+        rect = self.suggestion_rect
+        row_height = rect.height // len(self.suggestions)
+        pygame.draw.rect(self.screen, SECONDARY_COLOR, rect)
+        for k, word in enumerate(self.suggestions):
+            row = pygame.Rect(rect.left, rect.top + k * row_height, rect.width, row_height)
+            if k == self.suggestion_selected:
+                pygame.draw.rect(self.screen, ACCENT_COLOR, row)
+            text = self.fonts.render(word, FONT_SIZE)
+            self.screen.blit(text, text.get_rect(midleft=(row.left + 8, row.centery)), pygame.Rect(0, 0, row.width - 16, row_height))
+        pygame.draw.rect(self.screen, ACCENT_COLOR, rect, 1)
+
+    def copy_selected_text(self):
+        text = self.editor.selected_text()
+        if not text:
+            return
+        self.clipboard = text
+        try:
+            pygame.scrap.put(pygame.SCRAP_TEXT, text.encode("utf-8"))
+        except pygame.error:
+            pass  # Системный буфер недоступен — остается внутренний
+
+    def cut_selected_text(self):
+        if self.editor.has_selection():
+            self.copy_selected_text()
+            self.editor.backspace()
+            self.input_changed()
+
+    def paste_text(self):
+        text = self.clipboard
+        try:
+            data = pygame.scrap.get(pygame.SCRAP_TEXT)
+            if data:
+                text = data.decode("utf-8", errors="ignore").rstrip("\x00")
+        except pygame.error:
+            pass
+        text = " ".join(text.split())  # Клетка однострочная: переводы строк становятся пробелами
+        if text:
+            self.editor.insert(text)
+            self.input_changed()
+
     def handle_left_click(self, pos):
+        if self.suggestions and self.suggestion_rect.collidepoint(pos):
+            self.accept_suggestion((pos[1] - self.suggestion_rect.top) * len(self.suggestions) // self.suggestion_rect.height)
+            return
         if self.save_button_rect.collidepoint(pos):
             self.save_preset()
             return
@@ -225,9 +1156,9 @@ class BingoGame:
             self.change_grid_size()
             return
 
-        grid_x = (pos[0] - self.grid_offset[0]) // self.cell_size
-        grid_y = (pos[1] - self.grid_offset[1]) // self.cell_size
-        if 0 <= grid_x < self.grid_size and 0 <= grid_y < self.grid_size:
+        cell = self.cell_at(pos)
+        if cell is not None:
+            grid_x, grid_y = cell
             if self.editing_cell == (grid_x, grid_y):
                 self.finish_editing()
             else:
@@ -235,60 +1166,180 @@ class BingoGame:
         else:
             self.finish_editing()
 
-    def handle_right_click(self, pos):
+    def cell_at(self, pos):
+        # Экранная точка -> клетка с учетом масштаба и сдвига; None вне видимого поля
+        if not self.grid_area.collidepoint(pos):
+            return None
         grid_x = (pos[0] - self.grid_offset[0]) // self.cell_size
         grid_y = (pos[1] - self.grid_offset[1]) // self.cell_size
         if 0 <= grid_x < self.grid_size and 0 <= grid_y < self.grid_size:
-            cell = (grid_x, grid_y)
-            if cell in self.marked_cells:
-                self.marked_cells.remove(cell)
-            else:
-                self.marked_cells.add(cell)
+            return grid_x, grid_y
+        return None
+
+    def handle_right_click(self, pos):
+        cell = self.cell_at(pos)
+        if cell is not None:
+            self.set_mark(*cell, cell not in self.marked_cells)
+
+    def set_mark(self, x, y, marked):
+        cell = (x, y)
+        if (cell in self.marked_cells) == marked:
+            return
+        if marked:
+            self.marked_cells.add(cell)
+        else:
+            self.marked_cells.remove(cell)
+        self.marked_mask ^= WinDetector.cell_bit(x, y, self.grid_size)
+        self.mark_cell_dirty(x, y)
+        self.publish_mark(x, y, marked)
+        self.check_win()
+
+    def check_win(self, announce=True):
+        old_lines = self.win_lines
+        old_count = len(old_lines)
+        old_mask = self.win_mask
+        self.win_lines = self.win_detector.completed_lines(self.marked_mask, self.grid_size)
+        self.win_mask = 0
+        for line in self.win_lines:
+            self.win_mask |= line
+
+        # Перерисовать клетки, у которых изменилась подсветка
+        changed = old_mask ^ self.win_mask
+        while changed:
+            bit = changed & -changed
+            index = bit.bit_length() - 1
+            self.mark_cell_dirty(index % self.grid_size, index // self.grid_size)
+            changed ^= bit
+
+        if announce and len(self.win_lines) > old_count:
+            self.set_message(f"БИНГО! Собрано линий: {len(self.win_lines)}")
+            old_lines = set(old_lines)
+            self.celebrate([line for line in self.win_lines if line not in old_lines])
+
+    def sync_marks(self):
+        self.marked_mask = self.win_detector.mask_from_cells(self.marked_cells, self.grid_size)
+        self.check_win(announce=False)
 
     def start_editing(self, x, y):
+        if self.editing_cell is not None:
+            self.mark_cell_dirty(*self.editing_cell)
         self.editing_cell = (x, y)
-        self.active_input = self.board[y][x]
-        self.cursor_position = len(self.active_input)
+        self.mark_cell_dirty(x, y)
+        self.editor = CellEditor(self.board[y][x])
         self.cursor_visible = True
-        self.cursor_timer = 0
+        self.cursor_blink_at = time.monotonic() + CURSOR_BLINK_INTERVAL
 
     def finish_editing(self):
         if self.editing_cell is not None:
             x, y = self.editing_cell
             self.board[y][x] = self.active_input
+            self.input_sync_at = None
+            self.mark_cell_dirty(x, y)
+            self.publish_cell(x, y)
+            self.show_suggestions([])
             self.editing_cell = None
-            self.active_input = ''
+            self.editor = CellEditor()
+
+    def publish_cell(self, x, y):
+        if self.autosave is not None:
+            self.autosave.record_cell(x, y, self.board[y][x])
+        self.publish({"c": [x, y], "t": self.board[y][x]})
+
+    def publish_mark(self, x, y, marked):
+        if self.autosave is not None:
+            self.autosave.record_mark(x, y, marked)
+        self.publish({"m": [x, y], "v": 1 if marked else 0})
+
+    def publish_snapshot(self):
+        if self.autosave is not None:
+            self.autosave.record_snapshot(self.grid_size, self.board, self.marked_cells)
+        self.publish(AutosaveJournal.snapshot_record(self.grid_size, self.board, self.marked_cells))
+
+    def publish(self, record):
+        # Ведущий экран рассылает все правки; подключенный отправляет только свои
+        if self.board_server is not None:
+            self.board_server.publish_threadsafe(record)
+        elif self.board_client is not None and not self.applying_remote:
+            self.board_client.send(record)
+
+    def autosave_failed(self, error):
+        # Вызывается из потока автосохранения
+        pygame.event.post(pygame.event.Event(AUTOSAVE_EVENT, error=str(error)))
+
+    def post_remote(self, record):
+        # Вызывается из сетевого потока, правка применяется в главном цикле
+        pygame.event.post(pygame.event.Event(NETWORK_EVENT, record=record))
+
+    def apply_remote(self, record):
+        # Сервер проверяет правки клиентов, но и ответы сервера проверяются так же
+        if not valid_record({"grid_size": self.grid_size}, record):
+            return
+        if "s" in record:
+            self.finish_editing()  # Начатая правка успеет уйти на сервер до замены поля
+        self.applying_remote = True
+        try:
+            if "s" in record:
+                self.apply_preset(*parse_preset(record["s"]))
+            elif "c" in record:
+                x, y = record["c"]
+                # Редактируемую здесь клетку не трогаем: при завершении правки уйдет ее текст
+                if self.editing_cell != (x, y):
+                    self.board[y][x] = record["t"]
+                    self.mark_cell_dirty(x, y)
+                    self.publish_cell(x, y)
+            elif "m" in record:
+                x, y = record["m"]
+                self.set_mark(x, y, bool(record["v"]))
+        finally:
+            self.applying_remote = False
 
     def update(self):
-        self.handle_events()
-        if self.message_timer > 0:
-            self.message_timer -= 1
-        else:
+        # Все таймеры считаются по реальному времени, а не по кадрам
+        now = time.monotonic()
+
+        if self.message and now >= self.message_until:
             self.message = ""
+            self.mark_dirty(self.message_rect)
+
+        dt = min(now - self.particles_time, MAX_PARTICLE_STEP)
+        self.particles_time = now
+        if self.particles.count:
+            self.mark_dirty(self.particles.bounds())
+            self.particles.step(dt)
+            if self.particles.count:
+                self.mark_dirty(self.particles.bounds())
 
-        for anim in self.animations[:]:
-            anim['progress'] += self.animation_speed
-            if anim['progress'] >= anim['duration']:
-                self.animations.remove(anim)
+        if self.input_sync_at is not None and now >= self.input_sync_at:
+            self.sync_input()
 
+        if self.editing_cell is not None and now >= self.cursor_blink_at:
+            self.cursor_visible = not self.cursor_visible
+            self.cursor_blink_at = now + CURSOR_BLINK_INTERVAL
+            self.mark_cell_dirty(*self.editing_cell)
+
+    def next_timeout(self):
+        # Сколько миллисекунд можно спать до следующего таймера:
+        # 0 — нужен следующий кадр сразу, None — ждать только событий
+        if self.particles.count or self.backspace_held:
+            return 0
+        deadlines = []
         if self.editing_cell is not None:
-            self.cursor_timer += 1
-            if self.cursor_timer >= 30:  # Мигание каждые полсекунды
-                self.cursor_visible = not self.cursor_visible
-                self.cursor_timer = 0
+            deadlines.append(self.cursor_blink_at)
+        if self.input_sync_at is not None:
+            deadlines.append(self.input_sync_at)
+        if self.message:
+            deadlines.append(self.message_until)
+        if self.hud_visible:
+            deadlines.append(time.monotonic() + HUD_REFRESH)
+        if not deadlines:
+            return None
+        return max(0, int((min(deadlines) - time.monotonic()) * 1000) + 1)
         
     def adjust_scale(self):
         # Расчет размера клетки и смещения сетки
         available_height = self.height - TOP_PANEL_HEIGHT - 50  # 50 пикселей для нижней надписи
-        max_cell_size = min(
-            (self.width - 2 * MARGIN) // self.grid_size,
-            (available_height - 2 * MARGIN) // self.grid_size
-        )
-        self.cell_size = max_cell_size
-        self.grid_offset = (
-            (self.width - self.grid_size * self.cell_size) // 2,
-            TOP_PANEL_HEIGHT + (available_height - self.grid_size * self.cell_size) // 2
-        )
+        self.grid_area = pygame.Rect(0, TOP_PANEL_HEIGHT, self.width, available_height)
+        self.update_view()
 
         # Расположение элементов верхней панели
         panel_center_y = TOP_PANEL_HEIGHT // 2
@@ -300,187 +1351,697 @@ class BingoGame:
         self.size_button_rect.topleft = (buttons_start_x + BUTTON_WIDTH + 10, panel_center_y - BUTTON_HEIGHT // 2)
         self.load_button_rect.topleft = (buttons_start_x + BUTTON_WIDTH * 2 + 20, panel_center_y - BUTTON_HEIGHT // 2)
 
-        # Расположение нижней надписи
-        self.author_rect = pygame.Rect(0, self.height - 30, self.width, 30)
+        # Расположение нижней надписи и строки сообщений
+        self.author_rect = self.author_surface.get_rect(center=(self.width // 2, self.height - 15))
+        self.message_rect = pygame.Rect(0, self.height - 55, self.width, 25)
+        self.hud_rect.topright = (self.width - 10, TOP_PANEL_HEIGHT + 10)
+        self.browser_rect = pygame.Rect(MARGIN, TOP_PANEL_HEIGHT + 10, self.width - 2 * MARGIN, self.height - TOP_PANEL_HEIGHT - 70)
+
+        self.cell_surfaces.clear()
+        self.invalidate_all()
+
+    def fit_cell_size(self):
+        return max(1, min(
+            (self.grid_area.width - 2 * MARGIN) // self.grid_size,
+            (self.grid_area.height - 2 * MARGIN) // self.grid_size
+        ))
+
+    def update_view(self):
+        # Размер клетки и смещение сетки по масштабу и сдвигу
+        old_cell_size = self.cell_size
+        self.cell_size = max(1, int(self.fit_cell_size() * self.zoom))
+        total = self.grid_size * self.cell_size
+        offset = []
+        for axis, (start, length) in enumerate(((self.grid_area.left, self.grid_area.width),
+                                                (self.grid_area.top, self.grid_area.height))):
+            centered = start + (length - total) // 2
+            if total + 2 * MARGIN <= length:
+                self.pan[axis] = 0
+                offset.append(centered)
+            else:
+                # Большое поле можно двигать, но не дальше его краев
+                value = min(max(centered + self.pan[axis], start + length - MARGIN - total), start + MARGIN)
+                self.pan[axis] = value - centered
+                offset.append(value)
+        self.grid_offset = tuple(offset)
+        self.layout_cache.invalidate(self.cell_size)
+        if self.cell_size != old_cell_size:
+            self.cell_surfaces.clear()
+        self.mark_dirty(self.grid_area)
+        if self.suggestions:
+            # Список подсказок следует за клеткой
+            selected = self.suggestion_selected
+            self.show_suggestions(self.suggestions)
+            self.suggestion_selected = selected
+
+    def reset_view(self):
+        self.zoom = 1.0
+        self.pan = [0, 0]
+
+    def zoom_at(self, pos, factor):
+        fit = self.fit_cell_size()
+        zoom = min(max(1.0, self.zoom * factor), max(1.0, MAX_CELL_SIZE / fit))
+        if zoom == self.zoom:
+            return
+        # Точка поля под курсором остается на месте
+        world_x = (pos[0] - self.grid_offset[0]) / self.cell_size
+        world_y = (pos[1] - self.grid_offset[1]) / self.cell_size
+        self.zoom = zoom
+        self.pan = [0, 0]
+        self.update_view()
+        self.pan_view(pos[0] - world_x * self.cell_size - self.grid_offset[0],
+                      pos[1] - world_y * self.cell_size - self.grid_offset[1])
+
+    def pan_view(self, dx, dy):
+        self.pan[0] += int(dx)
+        self.pan[1] += int(dy)
+        self.update_view()
+        self.prune_cell_surfaces()
+
+    def visible_cells(self, rect=None):
+        # Диапазоны клеток, попадающих в прямоугольник экрана (по умолчанию — вся область поля)
+        rect = self.grid_area if rect is None else rect.clip(self.grid_area)
+        first_x = max(0, (rect.left - self.grid_offset[0]) // self.cell_size)
+        last_x = min(self.grid_size, (rect.right - 1 - self.grid_offset[0]) // self.cell_size + 1)
+        first_y = max(0, (rect.top - self.grid_offset[1]) // self.cell_size)
+        last_y = min(self.grid_size, (rect.bottom - 1 - self.grid_offset[1]) // self.cell_size + 1)
+        if rect.width <= 0 or rect.height <= 0:
+            return range(0), range(0)
+        return range(first_x, last_x), range(first_y, last_y)
+
+    def prune_cell_surfaces(self):
+        # Изображения клеток, ушедших далеко за край, не держим в памяти
+        columns, rows = self.visible_cells()
+        if len(self.cell_surfaces) <= 2 * len(columns) * len(rows):
+            return
+        for (i, j) in list(self.cell_surfaces):
+            if i not in columns or j not in rows:
+                del self.cell_surfaces[(i, j)]
+
+    def invalidate_all(self):
+        self.full_redraw = True
+        self.dirty_rects = []
+
+    def mark_dirty(self, rect):
+        if self.full_redraw:
+            return
+        rect = pygame.Rect(rect).clip(self.screen.get_rect())
+        if rect.width <= 0 or rect.height <= 0:
+            return
+        # Пересекающиеся области объединяем, чтобы не рисовать их дважды
+        index = rect.collidelist(self.dirty_rects)
+        while index != -1:
+            rect.union_ip(self.dirty_rects.pop(index))
+            index = rect.collidelist(self.dirty_rects)
+        self.dirty_rects.append(rect)
+
+    def cell_rect(self, x, y):
+        return pygame.Rect(
+            self.grid_offset[0] + x * self.cell_size,
+            self.grid_offset[1] + y * self.cell_size,
+            self.cell_size, self.cell_size
+        )
+
+    def mark_cell_dirty(self, x, y):
+        self.cell_surfaces.pop((x, y), None)
+        self.mark_dirty(self.cell_rect(x, y))
+
+    def set_message(self, text):
+        self.message = text
+        self.message_until = time.monotonic() + MESSAGE_DURATION
+        self.mark_dirty(self.message_rect)
 
     def change_grid_size(self):
+        self.finish_editing()
         self.current_size_index = (self.current_size_index + 1) % len(self.available_sizes)
         self.grid_size = self.available_sizes[self.current_size_index]
         self.board = self.generate_board()
         self.marked_cells = set()
+        self.sync_marks()
+        self.reset_view()
         self.adjust_scale()
         self.current_size_button_surface = self.size_buttons_surfaces[self.grid_size]
+        self.publish_snapshot()
 
     def save_preset(self):
-        root = Tk()
-        root.withdraw()
-        file_path = filedialog.asksaveasfilename(
-            defaultextension=".json",
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
-            initialfile=f"preset_{self.grid_size}x{self.grid_size}.json"
-        )
-        if file_path:
-            preset = {
-                "grid_size": self.grid_size,
-                "board": self.board,
-                "marked_cells": list(self.marked_cells)
-            }
-            with open(file_path, "w") as f:
-                json.dump(preset, f)
-            self.message = f"Пресет сохранен как {os.path.basename(file_path)}"
-        else:
-            self.message = "Сохранение отменено"
-        self.message_timer = 120
+        # Снимок поля делается сразу, диалог и запись идут в фоновом потоке
+        self.sync_input()
+        preset = {
+            "grid_size": self.grid_size,
+            "board": [row[:] for row in self.board],
+            "marked_cells": list(self.marked_cells)
+        }
+        if not self.preset_worker.submit(self.preset_worker.save, preset, f"preset_{self.grid_size}x{self.grid_size}.json"):
+            self.set_message("Дождитесь закрытия окна выбора файла")
 
     def load_preset(self):
-        root = Tk()
-        root.withdraw()
-        file_path = filedialog.askopenfilename(
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
-        )
-        if file_path:
+        if not self.preset_worker.submit(self.preset_worker.load):
+            self.set_message("Дождитесь закрытия окна выбора файла")
+
+    def handle_preset_event(self, event):
+        if event.action == "saved":
+            # В библиотеку идет то, что записано в файл, а не поле, измененное за время диалога
+            name = os.path.basename(event.path)
+            preset = event.preset
             try:
-                with open(file_path, "r") as f:
-                    preset = json.load(f)
-                self.grid_size = preset["grid_size"]
-                self.board = preset["board"]
-                self.marked_cells = set(map(tuple, preset["marked_cells"]))
-                self.adjust_scale()
-                self.message = f"Пресет {os.path.basename(file_path)} загружен"
-            except Exception as e:
-                self.message = f"Ошибка при загрузке пресета: {str(e)}"
+                self.get_library().add(name, preset["grid_size"], preset["board"], set(map(tuple, preset["marked_cells"])), event.path)
+            except sqlite3.Error as e:
+                self.set_message(f"Пресет сохранен как {name}, но не добавлен в библиотеку: {e}")
+                return
+            self.set_message(f"Пресет сохранен как {name}")
+        elif event.action == "save_cancelled":
+            self.set_message("Сохранение отменено")
+        elif event.action == "save_error":
+            self.set_message(f"Ошибка при сохранении пресета: {event.error}")
+        elif event.action == "loaded":
+            self.apply_preset(event.grid_size, event.board, event.marked_cells)
+            self.set_message(f"Пресет {os.path.basename(event.path)} загружен")
+        elif event.action == "words_loaded":
+            self.word_pool = event.pool
+            self.set_message(f"Пул слов: {len(event.pool)} из {os.path.basename(event.path)}")
+        elif event.action == "words_error":
+            self.set_message(f"Не удалось загрузить пул слов {os.path.basename(event.path)}: {event.error}")
+        elif event.action == "load_cancelled":
+            self.set_message("Загрузка отменена")
         else:
-            self.message = "Загрузка отменена"
-        self.message_timer = 120
+            self.set_message(f"Ошибка при загрузке пресета: {event.error}")
+
+    def apply_preset(self, grid_size, board, marked_cells):
+        # Уже проверенный пресет подменяет поле целиком за один шаг главного цикла
+        self.finish_editing()
+        self.grid_size = grid_size
+        self.board = board
+        self.marked_cells = marked_cells
+        if grid_size in self.available_sizes:
+            self.current_size_index = self.available_sizes.index(grid_size)
+            self.current_size_button_surface = self.size_buttons_surfaces[grid_size]
+        self.sync_marks()
+        self.reset_view()
+        self.adjust_scale()
+        self.publish_snapshot()
+
+    def get_library(self):
+        if self.library is None:
+            self.library = PresetStore(LIBRARY_PATH)
+        return self.library
+
+    def save_to_library(self):
+        self.sync_input()
+        name = f"{self.grid_size}x{self.grid_size} {time.strftime('%Y-%m-%d %H:%M:%S')}"
+        try:
+            self.get_library().add(name, self.grid_size, self.board, self.marked_cells)
+        except sqlite3.Error as e:
+            self.set_message(f"Ошибка библиотеки пресетов: {e}")
+            return
+        self.set_message(f"Пресет «{name}» добавлен в библиотеку")
+
+    def open_browser(self):
+        self.browser_open = True
+        self.browser_selected = 0
+        self.refresh_browser()
+
+    def close_browser(self):
+        self.browser_open = False
+        self.mark_dirty(self.browser_rect)
+
+    def browser_row_height(self):
+        return self.font.get_linesize() + 8
+
+    def refresh_browser(self):
+        rows = max(1, self.browser_rect.height // self.browser_row_height() - 2)
+        try:
+            self.browser_results = self.get_library().search(self.browser_query, self.browser_size, rows)
+        except sqlite3.Error as e:
+            self.set_message(f"Ошибка библиотеки пресетов: {e}")
+            self.close_browser()
+            return
+        self.browser_selected = min(self.browser_selected, max(0, len(self.browser_results) - 1))
+        self.mark_dirty(self.browser_rect)
+
+    def handle_browser_key(self, event):
+        if event.key == pygame.K_ESCAPE or (event.key == pygame.K_f and pygame.key.get_mods() & pygame.KMOD_CTRL):
+            self.close_browser()
+            return
+        if event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+            self.load_from_browser(self.browser_selected)
+            return
+        if event.key == pygame.K_UP:
+            self.browser_selected = max(0, self.browser_selected - 1)
+        elif event.key == pygame.K_DOWN:
+            self.browser_selected = min(len(self.browser_results) - 1, self.browser_selected + 1)
+        elif event.key == pygame.K_TAB:
+            # Фильтр по размеру: все, 3x3, 4x4, ...
+            sizes = [None] + self.available_sizes
+            self.browser_size = sizes[(sizes.index(self.browser_size) + 1) % len(sizes)] if self.browser_size in sizes else None
+        elif event.key == pygame.K_BACKSPACE:
+            self.browser_query = self.browser_query[:-1]
+        elif event.unicode and event.unicode.isprintable():
+            self.browser_query += event.unicode
+        self.refresh_browser()
+
+    def handle_browser_click(self, pos):
+        if not self.browser_rect.collidepoint(pos):
+            self.close_browser()
+            return
+        row = (pos[1] - self.browser_rect.top) // self.browser_row_height() - 1
+        if 0 <= row < len(self.browser_results):
+            self.load_from_browser(row)
+
+    def load_from_browser(self, index):
+        if not 0 <= index < len(self.browser_results):
+            return
+        info = self.browser_results[index]
+        self.close_browser()
+        try:
+            preset = self.get_library().get(info.id)
+        except sqlite3.Error as e:
+            self.set_message(f"Ошибка библиотеки пресетов: {e}")
+            return
+        self.apply_preset(*preset)
+        self.set_message(f"Пресет «{info.name}» загружен")
+
+    def draw_browser(self):
+        pygame.draw.rect(self.screen, SECONDARY_COLOR, self.browser_rect)
+        pygame.draw.rect(self.screen, ACCENT_COLOR, self.browser_rect, 2)
+        row_height = self.browser_row_height()
+        size_label = "все" if self.browser_size is None else f"{self.browser_size}x{self.browser_size}"
+        header = f"Поиск: {self.browser_query}_    Размер: {size_label}    Enter — загрузить, Tab — размер, Esc — закрыть"
+        x = self.browser_rect.left + 10
+        y = self.browser_rect.top + 4
+        self.screen.blit(self.fonts.render(header, FONT_SIZE), (x, y))
+        for k, info in enumerate(self.browser_results):
+            y = self.browser_rect.top + (k + 1) * row_height
+            if k == self.browser_selected:
+                pygame.draw.rect(self.screen, ACCENT_COLOR, (self.browser_rect.left + 2, y, self.browser_rect.width - 4, row_height))
+            text = f"{info.name}  ({info.grid_size}x{info.grid_size})  {info.words[:120]}"
+            self.screen.blit(self.fonts.render(text, FONT_SIZE), (x, y + 4))
+        if not self.browser_results:
+            self.screen.blit(self.fonts.render("Ничего не найдено", FONT_SIZE), (x, self.browser_rect.top + row_height + 4))
 
     def wrap_text(self, text, font_size, max_width):
-        if font_size not in self.font_cache:
-            self.font_cache[font_size] = pygame.font.Font(None, font_size)
-        font = self.font_cache[font_size]
-        words = text.split()
+        # Ширина строки растет по таблице ширин символов, без измерения каждого варианта строки
+        measure = self.fonts.measure
+        space = measure(' ', font_size)
         lines = []
         current_line = []
-        for word in words:
-            test_line = ' '.join(current_line + [word])
-            test_width = font.size(test_line)[0]
-            if test_width <= max_width:
+        current_width = 0
+        for word in text.split():
+            width = measure(word, font_size)
+            if not current_line:
+                current_line = [word]
+                current_width = width
+            elif current_width + space + width <= max_width:
                 current_line.append(word)
+                current_width += space + width
             else:
                 lines.append(' '.join(current_line))
                 current_line = [word]
+                current_width = width
         lines.append(' '.join(current_line))
         return lines
 
     def draw(self):
-        self.screen.fill(BACKGROUND_COLOR)
+        if self.full_redraw:
+            rects = [self.screen.get_rect()]
+        elif self.dirty_rects:
+            rects = self.dirty_rects
+        else:
+            return
+
+        for rect in rects:
+            self.draw_region(rect)
+        self.screen.set_clip(None)
+
+        if self.full_redraw:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+        self.full_redraw = False
+        self.dirty_rects = []
+
+    def draw_region(self, rect):
+        self.screen.set_clip(rect)
+        self.screen.fill(BACKGROUND_COLOR, rect)
 
         # Отрисовка верхней панели
-        pygame.draw.rect(self.screen, SECONDARY_COLOR, (0, 0, self.width, TOP_PANEL_HEIGHT))
-        
-        # Отрисовка логотипа
-        self.screen.blit(self.logo_surface, self.logo_rect)
+        panel_rect = pygame.Rect(0, 0, self.width, TOP_PANEL_HEIGHT)
+        if rect.colliderect(panel_rect):
+            pygame.draw.rect(self.screen, SECONDARY_COLOR, panel_rect)
+            self.screen.blit(self.logo_surface, self.logo_rect)
+            self.screen.blit(self.save_button_surface, self.save_button_rect)
+            self.screen.blit(self.load_button_surface, self.load_button_rect)
+            self.screen.blit(self.current_size_button_surface, self.size_button_rect)
 
-        # Отрисовка кнопок
-        self.screen.blit(self.save_button_surface, self.save_button_rect)
-        self.screen.blit(self.load_button_surface, self.load_button_rect)
-        self.screen.blit(self.current_size_button_surface, self.size_button_rect)
+        # Отрисовка только тех клеток, которые видны и попадают в область
+        columns, rows = self.visible_cells(rect)
+        if columns and rows:
+            self.screen.set_clip(rect.clip(self.grid_area))
+            for i in columns:
+                for j in rows:
+                    self.draw_cell(i, j)
+            self.screen.set_clip(rect)
 
-        # Отрисовка игрового поля
-        for i in range(self.grid_size):
-            for j in range(self.grid_size):
-                x = self.grid_offset[0] + i * self.cell_size
-                y = self.grid_offset[1] + j * self.cell_size
-                rect = pygame.Rect(x, y, self.cell_size, self.cell_size)
-                if self.editing_cell == (i, j):
-                    pygame.draw.rect(self.screen, ACCENT_COLOR, rect)
-                else:
-                    pygame.draw.rect(self.screen, SECONDARY_COLOR, rect)
-                pygame.draw.rect(self.screen, TEXT_COLOR, rect, 2)
-                word = self.board[j][i]
-                if (i, j) == self.editing_cell:
-                    word = self.active_input
-                if word:
-                    self.draw_word(word, x, y)
-                if (i, j) in self.marked_cells:
-                    pygame.draw.line(self.screen, (255, 0, 0), (x + 5, y + 5), (x + self.cell_size - 5, y + self.cell_size - 5), 4)
-                    pygame.draw.line(self.screen, (255, 0, 0), (x + self.cell_size - 5, y + 5), (x + 5, y + self.cell_size - 5), 4)
-                
+        # Отрисовка анимаций и частиц
+        if self.particles.count:
+            self.particles.draw(self.screen, rect)
+
+        # Отрисовка подсказок из пула слов
+        if self.suggestions and rect.colliderect(self.suggestion_rect):
+            self.draw_suggestions()
+
+        # Отрисовка окна библиотеки пресетов
+        if self.browser_open and rect.colliderect(self.browser_rect):
+            self.draw_browser()
+
+        # Отрисовка сообщения
+        if self.message and rect.colliderect(self.message_rect):
+            message_text = self.fonts.render(self.message, FONT_SIZE)
+            self.screen.blit(message_text, message_text.get_rect(center=self.message_rect.center))
 
-        # Отрисовка анимаций
-        for anim in self.animations:
-                    progress = anim['progress'] / anim['duration']
-                    current_pos = (
-                        anim['start_pos'][0] + (anim['end_pos'][0] - anim['start_pos'][0]) * progress,
-                        anim['start_pos'][1] + (anim['end_pos'][1] - anim['start_pos'][1]) * progress
-                    )
-                    pygame.draw.circle(self.screen, (255, 0, 0), (int(current_pos[0]), int(current_pos[1])), 5)
+        # Отрисовка HUD профайлера
+        if self.hud_visible and rect.colliderect(self.hud_rect):
+            self.draw_hud()
 
         # Отрисовка надписи автора
-        author_text = self.author_font.render("Made by serezha168", True, TEXT_COLOR)
-        self.author_rect = author_text.get_rect(center=(self.width // 2, self.height - 15))
-        self.screen.blit(author_text, self.author_rect)
+        if rect.colliderect(self.author_rect):
+            self.screen.blit(self.author_surface, self.author_rect)
 
-        pygame.display.flip()
+    def draw_cell(self, i, j):
+        surface = self.cell_surfaces.get((i, j))
+        if surface is None:
+            surface = self.render_cell(i, j)
+            self.cell_surfaces[(i, j)] = surface
+        self.screen.blit(surface, self.cell_rect(i, j))
 
-    def draw_word(self, word, x, y):
-        max_font_size = 30  # Максимальный размер шрифта
-        min_font_size = 10  # Минимальный размер шрифта
-        font_size = max_font_size
-        
-        while font_size >= min_font_size:
-            if font_size not in self.font_cache:
-                self.font_cache[font_size] = pygame.font.Font(None, font_size)
-            font = self.font_cache[font_size]
-            
-            lines = self.wrap_text(word, font_size, self.cell_size - 10)
-            
-            if len(lines) <= 3 and max(font.size(line)[0] for line in lines) <= self.cell_size - 10:
-                total_height = len(lines) * font.get_linesize()
-                if total_height <= self.cell_size - 10:
-                    break
-            
-            font_size -= 1
-        
-        y_offset = y + (self.cell_size - len(lines) * font.get_linesize()) // 2
-        
-        for line in lines:
-            text = font.render(line, True, TEXT_COLOR)
-            text_rect = text.get_rect(center=(x + self.cell_size // 2, y_offset + font.get_linesize() // 2))
-            self.screen.blit(text, text_rect)
-            y_offset += font.get_linesize()
-        
-        if self.editing_cell is not None and (x, y) == (self.grid_offset[0] + self.editing_cell[0] * self.cell_size, self.grid_offset[1] + self.editing_cell[1] * self.cell_size):
-            if self.cursor_visible:
-                cursor_pos = 0
-                for j, line in enumerate(lines):
-                    if cursor_pos <= self.cursor_position <= cursor_pos + len(line):
-                        cursor_x = x + (self.cell_size - font.size(line)[0]) // 2 + font.size(line[:self.cursor_position - cursor_pos])[0]
-                        cursor_y = y + (self.cell_size - len(lines) * font.get_linesize()) // 2 + j * font.get_linesize()
-                        pygame.draw.line(self.screen, TEXT_COLOR, (cursor_x, cursor_y), (cursor_x, cursor_y + font.get_linesize()), 2)
+    def render_cell(self, i, j):
+        surface = pygame.Surface((self.cell_size, self.cell_size)).convert()
+        rect = surface.get_rect()
+        editing = self.editing_cell == (i, j)
+        if editing:
+            surface.fill(ACCENT_COLOR)
+        else:
+            surface.fill(SECONDARY_COLOR)
+        if self.win_mask & WinDetector.cell_bit(i, j, self.grid_size):
+            pygame.draw.rect(surface, WIN_COLOR, rect, 4)
+        else:
+            pygame.draw.rect(surface, TEXT_COLOR, rect, 2)
+        word = self.active_input if editing else self.board[j][i]
+        if word and self.cell_size >= MIN_TEXT_CELL_SIZE:
+            self.draw_word(word, 0, 0, surface, editing)
+        if (i, j) in self.marked_cells:
+            inset = min(5, self.cell_size // 8)
+            width = max(1, min(4, self.cell_size // 10))
+            pygame.draw.line(surface, (255, 0, 0), (inset, inset), (self.cell_size - inset, self.cell_size - inset), width)
+            pygame.draw.line(surface, (255, 0, 0), (self.cell_size - inset, inset), (inset, self.cell_size - inset), width)
+        return surface
+
+    def layout_text(self, word):
+        key = (word, self.cell_size, self.fonts.path)
+        layout = self.layout_cache.get(key)
+        if layout is not None:
+            return layout
+
+        # Подбор максимального размера шрифта, при котором текст влезает в клетку
+        max_width = self.cell_size - 10
+        font_size = MAX_WORD_FONT_SIZE
+        while font_size >= MIN_WORD_FONT_SIZE:
+            font = self.fonts.get(font_size)
+            lines = self.wrap_text(word, font_size, max_width)
+            if len(lines) <= 3 and max(self.fonts.measure(line, font_size) for line in lines) <= max_width:
+                if len(lines) * font.get_linesize() <= self.cell_size - 10:
+                    # Точная ширина (с кернингом и выносами глифов) — только у подошедших строк
+                    widths = [font.size(line)[0] for line in lines]
+                    if max(widths) <= max_width:
                         break
-                    cursor_pos += len(line)
+            font_size -= 1
+        if font_size < MIN_WORD_FONT_SIZE:
+            font_size = MIN_WORD_FONT_SIZE
+            widths = [font.size(line)[0] for line in lines]
+
+        line_height = font.get_linesize()
+        top = (self.cell_size - len(lines) * line_height) // 2
+        offsets = [(self.cell_size // 2, top + i * line_height + line_height // 2) for i in range(len(lines))]
+        layout = TextLayout(font_size, lines, offsets, widths, line_height)
+        self.layout_cache.put(key, layout)
+        return layout
 
-            y_offset += font.get_linesize()
+    def draw_word(self, word, x, y, surface=None, editing=False):
+        if surface is None:
+            surface = self.screen
+        layout = self.layout_text(word)
+        font = self.fonts.get(layout.font_size)
+
+        # Позиции строк в исходном тексте (строки разделены одним пробелом)
+        line_starts = []
+        pos = 0
+        for line in layout.lines:
+            line_starts.append(pos)
+            pos += len(line) + 1
+
+        if editing and self.editor.has_selection():
+            sel_start, sel_end = self.editor.selection_range()
+            for j, line in enumerate(layout.lines):
+                start = max(sel_start, line_starts[j]) - line_starts[j]
+                end = min(sel_end, line_starts[j] + len(line)) - line_starts[j]
+                if start < end:
+                    left = x + (self.cell_size - layout.widths[j]) // 2
+                    top = y + layout.offsets[j][1] - layout.line_height // 2
+                    x1 = left + font.size(line[:start])[0]
+                    x2 = left + font.size(line[:end])[0]
+                    pygame.draw.rect(surface, SELECTION_COLOR, (x1, top, x2 - x1, layout.line_height))
+
+        for line, (dx, dy) in zip(layout.lines, layout.offsets):
+            text = self.fonts.render(line, layout.font_size)
+            text_rect = text.get_rect(center=(x + dx, y + dy))
+            surface.blit(text, text_rect)
+
+        if editing and self.cursor_visible:
+            for j, line in enumerate(layout.lines):
+                if line_starts[j] <= self.cursor_position <= line_starts[j] + len(line):
+                    cursor_x = x + (self.cell_size - layout.widths[j]) // 2 + font.size(line[:self.cursor_position - line_starts[j]])[0]
+                    cursor_y = y + layout.offsets[j][1] - layout.line_height // 2
+                    pygame.draw.line(surface, TEXT_COLOR, (cursor_x, cursor_y), (cursor_x, cursor_y + layout.line_height), 2)
+                    break
+
+    def render_card(self, board, cell_size):
+        # Отрисовка карточки целиком вне экрана (для пакетной печати).
+        # Меняет состояние игры, поэтому используется только в безоконном режиме
+        self.finish_editing()
+        self.grid_size = len(board)
+        self.board = board
+        self.marked_cells = set()
+        self.sync_marks()
+        self.cell_size = cell_size
+        self.layout_cache.invalidate(cell_size)
+        self.cell_surfaces.clear()
+
+        surface = pygame.Surface((self.grid_size * cell_size, self.grid_size * cell_size))
+        for i in range(self.grid_size):
+            for j in range(self.grid_size):
+                surface.blit(self.render_cell(i, j), (i * cell_size, j * cell_size))
+        return surface
 
     def open_link(self, url):
         webbrowser.open(url)
 
     def add_animation(self, start_pos, end_pos, duration):
-        self.animations.append({
-            'start_pos': start_pos,
-            'end_pos': end_pos,
-            'duration': duration,
-            'progress': 0
-        })
+        # Точка, летящая от start_pos к end_pos за duration секунд
+        velocity = ((end_pos[0] - start_pos[0]) / duration, (end_pos[1] - start_pos[1]) / duration)
+        self.particles.emit([start_pos], velocity, duration, (255, 0, 0), 10)
+        self.particles_time = time.monotonic()
+
+    def celebrate(self, lines):
+        # Салют из клеток собранных линий
+        centers = []
+        for line in lines:
+            while line:
+                bit = line & -line
+                index = bit.bit_length() - 1
+                centers.append(self.cell_rect(index % self.grid_size, index // self.grid_size).center)
+                line ^= bit
+        if not centers:
+            return
+        count = CELEBRATION_PARTICLES * len(lines)
+        rng = self.rng
+        origins = np.asarray(centers, np.float32)[rng.integers(0, len(centers), count)]
+        angle = rng.uniform(0, 2 * np.pi, count)
+        speed = rng.uniform(150, 650, count)
+        velocity = np.stack([np.cos(angle) * speed, np.sin(angle) * speed - 300], axis=1)
+        colors = np.asarray(CONFETTI_COLORS, np.uint8)[rng.integers(0, len(CONFETTI_COLORS), count)]
+        self.particles.emit(origins, velocity, rng.uniform(0.8, 1.8, count), colors,
+                            rng.integers(2, 6, count), CELEBRATION_GRAVITY)
+        self.particles_time = time.monotonic()
+        self.mark_dirty(self.particles.bounds())
+
+    def wait_events(self):
+        timeout = self.next_timeout() if self.idle_mode else 0
+        if timeout == 0:
+            self.clock.tick(FPS)
+            return pygame.event.get()
+        if timeout is None:
+            event = pygame.event.wait()
+        else:
+            event = pygame.event.wait(timeout)
+        events = [] if event.type == pygame.NOEVENT else [event]
+        return events + pygame.event.get()
+
+    def set_profiling(self, enabled):
+        # Обертки с замером кладутся в атрибуты экземпляра и перекрывают методы класса
+        profiler = self.profiler
+        if enabled == profiler.enabled:
+            return
+        profiler.enabled = enabled
+        for name in PROFILED_METHODS + ("draw_cell",):
+            self.__dict__.pop(name, None)
+        if enabled:
+            profiler.reset()
+            for name in PROFILED_METHODS:
+                setattr(self, name, profiler.wrap(name, getattr(BingoGame, name).__get__(self)))
+            self.draw_cell = profiler.count("draw_cell", BingoGame.draw_cell.__get__(self))
+            self.profile_baseline = (self.layout_cache.hits, self.layout_cache.misses, self.fonts.hits, self.fonts.misses)
+
+    def toggle_hud(self):
+        self.hud_visible = not self.hud_visible
+        self.set_profiling(self.hud_visible)
+        self.mark_dirty(self.hud_rect)
+
+    def export_trace(self):
+        if not self.profiler.enabled:
+            self.set_message("Профайлер выключен, включите его клавишей F3")
+            return
+        path = os.path.join(TRACE_DIR, time.strftime("trace_%Y%m%d_%H%M%S.json"))
+        self.profiler.export(path)
+        self.set_message(f"Трасса за {self.profiler.trace_seconds} с сохраняется в {os.path.basename(path)}")
+
+    def profiled_frame(self):
+        marks = [time.perf_counter()]
+        events = self.wait_events()
+        marks.append(time.perf_counter())
+        self.handle_events(events)
+        marks.append(time.perf_counter())
+        self.update()
+        marks.append(time.perf_counter())
+        if self.hud_visible:
+            self.mark_dirty(self.hud_rect)
+        self.draw()
+        marks.append(time.perf_counter())
+        self.profiler.end_frame(marks)
+
+    def draw_hud(self):
+        profiler = self.profiler
+        hud = pygame.Surface(self.hud_rect.size, pygame.SRCALPHA)
+        hud.fill((0, 0, 0, 190))
+
+        hits = self.layout_cache.hits - self.profile_baseline[0]
+        misses = self.layout_cache.misses - self.profile_baseline[1]
+        layout_rate = hits / (hits + misses) * 100 if hits + misses else 100.0
+        drawn = profiler.calls.get("draw_cell", 0)
+        rendered = profiler.calls.get("render_cell", 0)
+        cell_rate = (1 - rendered / drawn) * 100 if drawn else 100.0
+        line_hits = self.fonts.hits - self.profile_baseline[2]
+        line_misses = self.fonts.misses - self.profile_baseline[3]
+        line_rate = line_hits / (line_hits + line_misses) * 100 if line_hits + line_misses else 100.0
+        frame_ms = profiler.frame_times[-1] * 1000 if profiler.frame_times else 0.0
+        lines = [
+            f"FPS {profiler.fps():.0f}   кадр {frame_ms:.2f} мс",
+            f"события {profiler.mean_ms('handle_events'):.2f}  update {profiler.mean_ms('update'):.2f}  "
+            f"draw {profiler.mean_ms('draw'):.2f} мс",
+            f"кэш раскладок {layout_rate:.0f}%  клеток {cell_rate:.0f}%  строк {line_rate:.0f}%",
+            f"draw_word: {profiler.calls.get('draw_word', 0)}   F4 — трасса",
+        ]
+        y = 6
+        for line in lines:
+            hud.blit(self.hud_font.render(line, True, TEXT_COLOR), (8, y))
+            y += 16
+
+        # График времени кадров: линия — бюджет кадра при FPS
+        graph = pygame.Rect(8, y + 4, self.hud_rect.width - 16, self.hud_rect.height - y - 12)
+        scale = graph.height / (2000 / FPS)
+        bar_width = graph.width / PROFILER_GRAPH_FRAMES
+        for k, frame_time in enumerate(profiler.frame_times):
+            height = min(graph.height, max(1, int(frame_time * 1000 * scale)))
+            color = WIN_COLOR if frame_time * FPS <= 1 else (255, 69, 58)
+            hud.fill(color, (graph.x + int(k * bar_width), graph.bottom - height, max(1, int(bar_width)), height))
+        budget_y = graph.bottom - int(1000 / FPS * scale)
+        pygame.draw.line(hud, TEXT_COLOR, (graph.x, budget_y), (graph.right, budget_y))
+        self.screen.blit(hud, self.hud_rect)
 
     def run(self):
         while self.running:
-            self.handle_events()
-            self.update()
-            self.draw()
-            self.clock.tick(60)
+            if self.profiler.enabled:
+                self.profiled_frame()
+            else:
+                self.handle_events(self.wait_events())
+                self.update()
+                self.draw()
+        self.sync_input()
+        self.preset_worker.stop()
+        if self.autosave is not None:
+            self.autosave.stop()
+        if self.board_server is not None:
+            self.board_server.stop()
+        if self.board_client is not None:
+            self.board_client.stop()
         pygame.quit()
 
-if __name__ == "__main__":
-    game = BingoGame()
+def import_preset_files(store, paths):
+    # Массовый импорт JSON-пресетов (файлы или папки) одной транзакцией
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith(".json"))
+        else:
+            files.append(path)
+    presets = []
+    errors = 0
+    for file_path in files:
+        try:
+            with open(file_path, "r") as f:
+                grid_size, board, marked_cells = parse_preset(json.load(f))
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            print(f"{file_path}: {e}")
+            errors += 1
+            continue
+        presets.append((os.path.basename(file_path), grid_size, board, marked_cells, os.path.abspath(file_path)))
+    store.add_many(presets)
+    return len(presets), errors
+
+def load_words(path):
+    # Задача PresetWorker: ошибки пула сообщаются отдельно от ошибок пресетов
+    try:
+        pool = WordPool.load(path)
+    except Exception as e:
+        return {"action": "words_error", "path": path, "error": str(e)}
+    return {"action": "words_loaded", "path": path, "pool": pool}
+
+def parse_address(text, default_host):
+    # "адрес:порт", ":порт" или просто "порт"
+    host, _, port = text.rpartition(":")
+    return host or default_host, int(port) if port else DEFAULT_PORT
+
+def main():
+    parser = argparse.ArgumentParser(description="Bingo")
+    parser.add_argument("--pool", help="Файл со словами или фразами: .txt по одной на строку или .csv (первый столбец)")
+    parser.add_argument("--import-presets", nargs="+", metavar="PATH", help="Импортировать JSON-пресеты в библиотеку")
+    parser.add_argument("--host", nargs="?", const=f"0.0.0.0:{DEFAULT_PORT}", metavar="ADDR:PORT",
+                        help="Раздавать поле другим экранам по сети")
+    parser.add_argument("--connect", metavar="ADDR:PORT", help="Подключиться к полю на ведущем экране")
+    parser.add_argument("--profile", action="store_true", help="Запустить с профайлером кадров и HUD")
+    args = parser.parse_args()
+
+    if args.import_presets:
+        store = PresetStore(LIBRARY_PATH)
+        imported, errors = import_preset_files(store, args.import_presets)
+        store.close()
+        print(f"Импортировано пресетов: {imported}, с ошибками: {errors}")
+        return
+
+    game = BingoGame(host=parse_address(args.host, "0.0.0.0") if args.host else None,
+                     connect=parse_address(args.connect, "127.0.0.1") if args.connect else None,
+                     words=args.pool)
+    if args.profile:
+        game.toggle_hud()
     game.run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import json
+import os
+import threading
+import time
+
+# Автосохранение: журнал правок (JSON по строке на запись) плюс периодический полный снимок.
+# Записи:
+#   {"s": {"grid_size": n, "board": [...], "marked_cells": [...]}}  — полный снимок поля
+#   {"c": [x, y], "t": "текст"}                                      — новый текст клетки
+#   {"m": [x, y], "v": 0 или 1}                                      — снятие/установка отметки
+
+AUTOSAVE_DELAY = 1.0    # Пауза после последней правки перед записью на диск, секунды
+AUTOSAVE_MAX_DELAY = 5.0  # Дольше этого самая старая несохраненная правка не ждет, даже если правки идут без пауз
+COMPACT_EVERY = 500     # Через сколько записей журнал сворачивается в снимок
+
+
+def apply_record(state, record):
+    if "s" in record:
+        snapshot = record["s"]
+        state["grid_size"] = snapshot["grid_size"]
+        state["board"] = [list(row) for row in snapshot["board"]]
+        state["marked_cells"] = set(map(tuple, snapshot["marked_cells"]))
+    elif "c" in record:
+        x, y = record["c"]
+        state["board"][y][x] = record["t"]
+    elif "m" in record:
+        cell = tuple(record["m"])
+        if record["v"]:
+            state["marked_cells"].add(cell)
+        else:
+            state["marked_cells"].discard(cell)
+
+
+class AutosaveJournal:
+    def __init__(self, directory, delay=AUTOSAVE_DELAY, compact_every=COMPACT_EVERY, on_error=None,
+                 max_delay=AUTOSAVE_MAX_DELAY):
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, "snapshot.json")
+        self.journal_path = os.path.join(directory, "journal.jsonl")
+        self.delay = delay
+        self.max_delay = max_delay
+        self.compact_every = compact_every
+        # on_error(ошибка) вызывается из потока записи, после нее журнал больше ничего не пишет
+        self.on_error = on_error
+        self.error = None
+
+        self.cond = threading.Condition()
+        self.pending = []
+        self.first_record_time = 0
+        self.last_record_time = 0
+        self.stopping = False
+        self.thread = None
+
+        # Копия состояния, которую ведет поток записи — из нее делается снимок
+        self.state = None
+        self.journal_records = 0
+
+    def restore(self):
+        # Последнее сохраненное состояние: снимок + все записи журнала после него
+        state = None
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                state = {}
+                apply_record(state, json.load(f))
+        except (OSError, ValueError, KeyError):
+            state = None
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # Недописанная строка после сбоя
+                    if state is None and "s" not in record:
+                        continue
+                    if state is None:
+                        state = {}
+                    try:
+                        apply_record(state, record)
+                    except (KeyError, IndexError, TypeError, ValueError):
+                        break
+        except OSError:
+            pass
+        return state
+
+    def start(self, grid_size, board, marked_cells):
+        os.makedirs(self.directory, exist_ok=True)
+        self.state = {}
+        apply_record(self.state, self.snapshot_record(grid_size, board, marked_cells))
+        self.compact()
+        self.thread = threading.Thread(target=self.run, name="autosave", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        with self.cond:
+            self.stopping = True
+            self.cond.notify()
+        self.thread.join()
+        self.thread = None
+
+    @staticmethod
+    def snapshot_record(grid_size, board, marked_cells):
+        return {"s": {
+            "grid_size": grid_size,
+            "board": [row[:] for row in board],
+            "marked_cells": sorted(marked_cells)
+        }}
+
+    def add(self, record, merge_cell=None):
+        with self.cond:
+            if self.error is not None:
+                return
+            self.last_record_time = time.monotonic()
+            if not self.pending:
+                self.first_record_time = self.last_record_time
+            # Подряд идущие правки одной клетки сливаются в одну запись
+            if merge_cell is not None and self.pending and self.pending[-1].get("c") == merge_cell:
+                self.pending[-1] = record
+            else:
+                self.pending.append(record)
+            self.cond.notify()
+
+    def record_cell(self, x, y, text):
+        self.add({"c": [x, y], "t": text}, merge_cell=[x, y])
+
+    def record_mark(self, x, y, marked):
+        self.add({"m": [x, y], "v": 1 if marked else 0})
+
+    def record_snapshot(self, grid_size, board, marked_cells):
+        self.add(self.snapshot_record(grid_size, board, marked_cells))
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.pending and not self.stopping:
+                    self.cond.wait()
+                # Ждем паузы в правках, чтобы не делать fsync на каждую клавишу,
+                # но не дольше max_delay с первой несохраненной правки
+                while not self.stopping:
+                    deadline = min(self.last_record_time + self.delay, self.first_record_time + self.max_delay)
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+                records = self.pending
+                self.pending = []
+                stopping = self.stopping
+
+            try:
+                if records:
+                    self.write(records)
+                if stopping:
+                    self.compact()
+                    return
+                if self.journal_records >= self.compact_every:
+                    self.compact()
+            except OSError as e:
+                # Диск заполнен, нет прав и т. п. — копить правки дальше бессмысленно
+                with self.cond:
+                    self.error = e
+                    self.pending = []
+                if self.on_error is not None:
+                    self.on_error(e)
+                return
+
+    def write(self, records):
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        for record in records:
+            apply_record(self.state, record)
+        self.journal_records += len(records)
+
+    def compact(self):
+        # Полный снимок пишется атомарно, после этого журнал начинается заново
+        record = self.snapshot_record(self.state["grid_size"], self.state["board"], self.state["marked_cells"])
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        with open(self.journal_path, "w", encoding="utf-8"):
+            pass
+        self.journal_records = 0
@@ -0,0 +1,150 @@
+import argparse
+import hashlib
+import importlib.util
+import json
+import math
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+import pygame
+
+from bingo_words import WordPool
+
+# Пакетная генерация карточек без окна: случайные поля из пула слов, PNG по карточке или листу
+# и cards.json с самими полями. Рисует та же BingoGame.render_card, что и игра
+
+GAME_SCRIPT = "bingo [1.6].py"
+BATCH_CELL_SIZE = 120  # Размер клетки при печати
+SHEET_MARGIN = 40      # Отступы на листе с несколькими карточками
+PDF_BATCH_PAGES = 50   # Сколько декодированных листов держать в памяти при сборке PDF
+
+
+def load_game():
+    # Основной скрипт из-за имени файла не импортируется обычным import
+    module = sys.modules.get("bingo")
+    if module is None:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), GAME_SCRIPT)
+        spec = importlib.util.spec_from_file_location("bingo", path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["bingo"] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+def generate_cards(pool, grid_size, count, seed=None) -> List[List[List[str]]]:
+    cells = grid_size * grid_size
+    if cells > len(pool):
+        raise ValueError(f"В пуле {len(pool)} слов, а на карточке {cells} клеток")
+    rng = random.Random(seed)
+    cards = []
+    seen = set()
+    attempts = 0
+    while len(cards) < count and attempts < count * 20:
+        attempts += 1
+        words = rng.sample(pool, cells)
+        # Повторы отсеиваются по хэшу карточки
+        digest = hashlib.blake2b("\x1f".join(words).encode("utf-8"), digest_size=16).digest()
+        if digest in seen:
+            continue
+        seen.add(digest)
+        cards.append([words[y * grid_size:(y + 1) * grid_size] for y in range(grid_size)])
+    return cards
+
+
+_batch_game = None
+
+
+def _init_batch_worker():
+    global _batch_game
+    _batch_game = load_game().BingoGame(autosave=False)
+
+
+def _render_sheet(job):
+    bingo = load_game()
+    path, first_number, boards, cell_size, per_row = job
+    card_size = len(boards[0]) * cell_size
+    rows = math.ceil(len(boards) / per_row)
+    columns = min(per_row, len(boards))
+    label_height = _batch_game.font.get_linesize() + 10
+    sheet = pygame.Surface((
+        columns * card_size + (columns + 1) * SHEET_MARGIN,
+        rows * (card_size + label_height) + (rows + 1) * SHEET_MARGIN
+    ))
+    sheet.fill(bingo.BACKGROUND_COLOR)
+    for k, board in enumerate(boards):
+        x = SHEET_MARGIN + (k % per_row) * (card_size + SHEET_MARGIN)
+        y = SHEET_MARGIN + (k // per_row) * (card_size + label_height + SHEET_MARGIN)
+        sheet.blit(_batch_game.render_card(board, cell_size), (x, y))
+        label = _batch_game.font.render(f"#{first_number + k}", True, bingo.TEXT_COLOR)
+        sheet.blit(label, label.get_rect(midtop=(x + card_size // 2, y + card_size + 5)))
+    pygame.image.save(sheet, path)
+    return path
+
+
+def save_pdf(paths, pdf_path):
+    # PDF дописывается пачками страниц, чтобы тысячи листов не лежали в памяти разом
+    from PIL import Image  # Нужен только для сборки PDF
+    for start in range(0, len(paths), PDF_BATCH_PAGES):
+        pages = [Image.open(path).convert("RGB") for path in paths[start:start + PDF_BATCH_PAGES]]
+        pages[0].save(pdf_path, "PDF", save_all=True, append_images=pages[1:], append=start > 0)
+        for page in pages:
+            page.close()
+
+
+def run_batch(args):
+    try:
+        pool = WordPool.load(args.pool).words
+    except OSError as e:
+        raise SystemExit(f"Не удалось прочитать пул {args.pool}: {e}")
+    if args.size < 1 or args.size * args.size > len(pool):
+        raise SystemExit(f"В пуле {len(pool)} слов, а на карточке {args.size}x{args.size} нужно {args.size * args.size}")
+    cards = generate_cards(pool, args.size, args.count, args.seed)
+    if len(cards) < args.count:
+        print(f"Удалось составить только {len(cards)} разных карточек")
+    os.makedirs(args.out, exist_ok=True)
+
+    per_sheet = max(1, args.per_sheet)
+    per_row = math.ceil(math.sqrt(per_sheet))
+    jobs = []
+    for start in range(0, len(cards), per_sheet):
+        name = f"card_{start + 1:05d}.png" if per_sheet == 1 else f"sheet_{start // per_sheet + 1:04d}.png"
+        jobs.append((os.path.join(args.out, name), start + 1, cards[start:start + per_sheet], args.cell_size, per_row))
+
+    with ProcessPoolExecutor(max_workers=args.workers or None, initializer=_init_batch_worker) as executor:
+        paths = list(executor.map(_render_sheet, jobs, chunksize=max(1, len(jobs) // 64)))
+
+    with open(os.path.join(args.out, "cards.json"), "w") as f:
+        json.dump([{"grid_size": args.size, "board": board, "marked_cells": []} for board in cards], f)
+
+    if args.pdf:
+        pdf_path = os.path.join(args.out, "cards.pdf")
+        if os.path.exists(pdf_path):
+            os.remove(pdf_path)  # Иначе первая пачка допишется к старому файлу
+        save_pdf(paths, pdf_path)
+    print(f"Готово: {len(cards)} карточек, {len(paths)} файлов в {args.out}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетная генерация карточек бинго без окна")
+    parser.add_argument("--pool", required=True, help="Файл со словами или фразами: .txt по одной на строку или .csv (первый столбец)")
+    parser.add_argument("--size", type=int, default=5, help="Размер поля")
+    parser.add_argument("--count", type=int, default=100, help="Сколько карточек сделать")
+    parser.add_argument("--out", default="cards", help="Папка для результатов")
+    parser.add_argument("--per-sheet", type=int, default=1, help="Карточек на одном листе")
+    parser.add_argument("--cell-size", type=int, default=BATCH_CELL_SIZE, help="Размер клетки, пикселей")
+    parser.add_argument("--pdf", action="store_true", help="Собрать листы в один PDF")
+    parser.add_argument("--workers", type=int, default=0, help="Число процессов (0 — все ядра)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    # Дочерние процессы наследуют окружение и тоже работают без окна
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    run_batch(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import pygame
+
+from bingo_batch import load_game
+
+# Замер отрисовки без окна: набор типичных сцен для полей разных размеров, по каждой —
+# p50/p95/p99 фаз кадра. Результаты пишутся в JSON и сравниваются с прошлым прогоном (--baseline)
+
+BENCHMARK_SIZES = [3, 4, 5, 6, 7, 20, 50]
+BENCHMARK_TEXTS = {
+    "empty": "",
+    "word": "Бинго",
+    "phrase": "Кто-то опоздал на созвон",
+    "long": "Очень длинная фраза, которая не помещается в одну строку и переносится в клетке несколько раз",
+}
+BENCHMARK_WINDOWS = [(800, 750), (1024, 768), (640, 600), (1280, 900), (720, 1000)]
+REGRESSION_THRESHOLD = 1.15  # Во сколько раз медленнее считается регрессией
+REGRESSION_FLOOR = 0.05      # Разница меньше этой, мс, — шум
+# Холодный старт меряется в отдельном процессе: в этом pygame и numpy уже загружены
+COLD_START_SCRIPT = ("import time; t = time.perf_counter(); from bingo_batch import load_game; "
+                     "bingo = load_game(); game = bingo.BingoGame(autosave=False); "
+                     "print(bingo.IMPORT_TIME, game.init_time, time.perf_counter() - t)")
+
+
+def frame_stats(samples):
+    # Миллисекунды: медиана, хвосты и среднее
+    ordered = sorted(samples)
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))] * 1000, 4)
+    return {"p50": pick(50), "p95": pick(95), "p99": pick(99), "mean": round(sum(ordered) / len(ordered) * 1000, 4)}
+
+
+def key_event(key, unicode=''):
+    return pygame.event.Event(pygame.KEYDOWN, key=key, unicode=unicode, mod=0, scancode=0)
+
+
+def benchmark_cases(game, sizes):
+    # (имя, подготовка поля, события кадра k, действие перед кадром вне замера)
+    def filled(size, text, marks=True):
+        def setup():
+            board = [[text for _ in range(size)] for _ in range(size)]
+            marked = {(i, i) for i in range(size)} if marks else set()
+            game.apply_preset(size, board, marked)
+            game.draw()
+        return setup
+
+    def expose(k):
+        return [pygame.event.Event(pygame.VIDEOEXPOSE)]
+
+    def drop_caches():
+        game.cell_surfaces.clear()
+        game.layout_cache.clear()
+
+    def resize(k):
+        w, h = BENCHMARK_WINDOWS[k % len(BENCHMARK_WINDOWS)]
+        return [pygame.event.Event(pygame.VIDEORESIZE, size=(w, h), w=w, h=h)]
+
+    def typing(k):
+        # Набор фразы, каждые 8 символов — два удаления
+        if k % 10 in (8, 9):
+            return [key_event(pygame.K_BACKSPACE)]
+        char = BENCHMARK_TEXTS["phrase"][k % len(BENCHMARK_TEXTS["phrase"])]
+        return [key_event(pygame.K_SPACE if char == ' ' else pygame.K_a, char)]
+
+    def navigate(k):
+        keys = [pygame.K_PLUS] * 4 + [pygame.K_RIGHT, pygame.K_DOWN] * 3 + [pygame.K_MINUS] * 4 + [pygame.K_LEFT, pygame.K_UP] * 3
+        return [key_event(keys[k % len(keys)])]
+
+    for size in sizes:
+        for name, text in BENCHMARK_TEXTS.items():
+            yield f"redraw/{size}x{size}/{name}", filled(size, text), expose, None
+            yield f"cold/{size}x{size}/{name}", filled(size, text), expose, drop_caches
+
+        yield f"resize/{size}x{size}", filled(size, BENCHMARK_TEXTS["phrase"]), resize, None
+
+        def edit_setup(size=size):
+            filled(size, BENCHMARK_TEXTS["word"])()
+            game.start_editing(size // 2, size // 2)
+        yield f"edit/{size}x{size}", edit_setup, typing, None
+
+        if size >= 20:
+            yield f"navigate/{size}x{size}", filled(size, BENCHMARK_TEXTS["word"]), navigate, None
+
+        def celebrate_setup(size=size):
+            filled(size, BENCHMARK_TEXTS["word"], marks=False)()
+            game.celebrate(game.win_detector.get_line_masks(size)[:size])
+        yield f"celebrate/{size}x{size}", celebrate_setup, lambda k: [], None
+
+
+def run_case(game, setup, frame_events, before_frame, frames):
+    setup()
+    timings = {"handle_events": [], "update": [], "draw": [], "frame": []}
+    for k in range(frames):
+        pygame.event.clear()
+        if before_frame is not None:
+            before_frame()
+        events = frame_events(k)
+        t0 = time.perf_counter()
+        game.handle_events(events)
+        t1 = time.perf_counter()
+        game.update()
+        t2 = time.perf_counter()
+        game.draw()
+        t3 = time.perf_counter()
+        timings["handle_events"].append(t1 - t0)
+        timings["update"].append(t2 - t1)
+        timings["draw"].append(t3 - t2)
+        timings["frame"].append(t3 - t0)
+    game.finish_editing()
+    game.particles.clear()
+    w, h = load_game().WINDOW_SIZE
+    if (game.width, game.height) != (w, h):
+        game.handle_events([pygame.event.Event(pygame.VIDEORESIZE, size=(w, h), w=w, h=h)])
+    return {phase: frame_stats(samples) for phase, samples in timings.items()}
+
+
+def git_revision():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def cold_startup():
+    # Миллисекунды: импорт модулей игры, BingoGame.__init__ и вся загрузка из свежего процесса
+    try:
+        result = subprocess.run([sys.executable, "-c", COLD_START_SCRIPT], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, timeout=60)
+        import_time, init_time, total = map(float, result.stdout.split()[-3:])
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+    return {"import": round(import_time * 1000, 2), "init": round(init_time * 1000, 2), "total": round(total * 1000, 2)}
+
+
+def compare_benchmarks(baseline, results):
+    # Случаи и фазы, где p50 или p95 заметно выросли относительно прошлого прогона
+    regressions = []
+    for name, phases in results["cases"].items():
+        old_phases = baseline.get("cases", {}).get(name)
+        if old_phases is None:
+            continue
+        for phase, stats in phases.items():
+            for key in ("p50", "p95"):
+                old, new = old_phases[phase][key], stats[key]
+                if new > old * REGRESSION_THRESHOLD and new - old > REGRESSION_FLOOR:
+                    regressions.append((name, phase, key, old, new))
+    return regressions
+
+
+def run_benchmark(args):
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+    game = load_game().BingoGame(autosave=False)
+    game.idle_mode = False
+    results = {
+        "revision": git_revision(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "sdl": ".".join(map(str, pygame.get_sdl_version())),
+        "platform": platform.platform(),
+        "frames": args.frames,
+        "startup_time": cold_startup(),
+        "cases": {}
+    }
+    for name, setup, frame_events, before_frame in benchmark_cases(game, args.sizes):
+        if args.cases and args.cases not in name:
+            continue
+        stats = run_case(game, setup, frame_events, before_frame, args.frames)
+        results["cases"][name] = stats
+        print(f"{name:<28} draw p50 {stats['draw']['p50']:8.3f} мс  p95 {stats['draw']['p95']:8.3f}  "
+              f"p99 {stats['draw']['p99']:8.3f}   кадр p95 {stats['frame']['p95']:8.3f}")
+    game.preset_worker.stop()
+    pygame.quit()
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=1, ensure_ascii=False)
+    print(f"Результаты записаны в {args.output}")
+
+    if baseline is not None:
+        regressions = compare_benchmarks(baseline, results)
+        for name, phase, key, old, new in regressions:
+            print(f"РЕГРЕССИЯ {name} {phase} {key}: {old:.3f} -> {new:.3f} мс")
+        if regressions:
+            raise SystemExit(1)
+        print(f"Регрессий относительно {baseline.get('revision') or args.baseline} нет")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер отрисовки бинго без окна")
+    parser.add_argument("--output", default="benchmark.json", help="Куда записать результаты в JSON")
+    parser.add_argument("--sizes", type=int, nargs="+", default=BENCHMARK_SIZES, help="Размеры полей для замера")
+    parser.add_argument("--frames", type=int, default=120, help="Кадров на каждый случай замера")
+    parser.add_argument("--cases", help="Замерять только случаи, в имени которых есть эта строка")
+    parser.add_argument("--baseline", help="JSON прошлого замера для поиска регрессий")
+    args = parser.parse_args()
+
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    run_benchmark(args)
+
+
+if __name__ == "__main__":
+    main()
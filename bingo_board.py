@@ -0,0 +1,79 @@
+from typing import List
+
+# Модель поля без pygame: проверка пресетов и поиск собранных линий.
+# Клетка (x, y) поля size x size имеет номер y * size + x — и в масках, и в списках клеток линий
+
+
+def is_cell(cell, size):
+    # Ровно два целых числа внутри поля; bool и float не подходят, хотя и сравниваются с числами
+    return (isinstance(cell, (list, tuple)) and len(cell) == 2
+            and all(type(value) is int and 0 <= value < size for value in cell))
+
+
+def parse_preset(preset):
+    # Проверка пресета; возвращает (grid_size, board, marked_cells) или бросает ValueError
+    if not isinstance(preset, dict):
+        raise ValueError("пресет должен быть объектом JSON")
+    grid_size = preset.get("grid_size")
+    if type(grid_size) is not int or grid_size < 1:
+        raise ValueError("неверный размер поля")
+    board = preset.get("board")
+    if (not isinstance(board, list) or len(board) != grid_size
+            or any(not isinstance(row, list) or len(row) != grid_size for row in board)):
+        raise ValueError("поле не совпадает с размером")
+    board = [[str(word) for word in row] for row in board]
+    marked = preset.get("marked_cells", [])
+    if not isinstance(marked, (list, set)):  # set — у состояния, восстановленного из автосохранения
+        raise ValueError("неверный список отметок")
+    marked_cells = set()
+    for cell in marked:
+        if not is_cell(cell, grid_size):
+            raise ValueError(f"отметка {cell} вне поля")
+        marked_cells.add(tuple(cell))
+    return grid_size, board, marked_cells
+
+
+class WinDetector:
+    # Отметки хранятся битовой маской: клетка (x, y) — бит y * size + x.
+    # Линии (строки, столбцы, две диагонали) и их маски считаются один раз на размер поля
+    def __init__(self, sizes=()):
+        self.lines = {}
+        self.line_masks = {}
+        for size in sizes:
+            self.get_line_masks(size)
+
+    def get_lines(self, size) -> List[List[int]]:
+        lines = self.lines.get(size)
+        if lines is None:
+            lines = [[y * size + x for x in range(size)] for y in range(size)]
+            lines += [[y * size + x for y in range(size)] for x in range(size)]
+            lines.append([i * size + i for i in range(size)])
+            lines.append([i * size + size - 1 - i for i in range(size)])
+            self.lines[size] = lines
+        return lines
+
+    def get_line_masks(self, size):
+        masks = self.line_masks.get(size)
+        if masks is None:
+            masks = [sum(1 << cell for cell in line) for line in self.get_lines(size)]
+            self.line_masks[size] = masks
+        return masks
+
+    @staticmethod
+    def cell_bit(x, y, size):
+        return 1 << (y * size + x)
+
+    def mask_from_cells(self, cells, size):
+        mask = 0
+        for x, y in cells:
+            if 0 <= x < size and 0 <= y < size:
+                mask |= self.cell_bit(x, y, size)
+        return mask
+
+    def completed_lines(self, mask, size):
+        return [line for line in self.get_line_masks(size) if mask & line == line]
+
+    def completed_lines_many(self, masks, size):
+        # Проверка сразу многих карточек одного размера
+        lines = self.get_line_masks(size)
+        return [[line for line in lines if mask & line == line] for mask in masks]
@@ -0,0 +1,124 @@
+import sqlite3
+import time
+from typing import List, NamedTuple
+
+# Библиотека пресетов в SQLite: поле, клетки, отметки и полнотекстовый индекс по словам
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS presets (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    source TEXT UNIQUE,
+    grid_size INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS presets_grid_size ON presets (grid_size, created);
+CREATE TABLE IF NOT EXISTS cells (
+    preset_id INTEGER NOT NULL REFERENCES presets (id) ON DELETE CASCADE,
+    x INTEGER NOT NULL,
+    y INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    marked INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (preset_id, y, x)
+) WITHOUT ROWID;
+"""
+
+
+class PresetInfo(NamedTuple):
+    id: int
+    name: str
+    grid_size: int
+    words: str
+
+
+def fts_query(text):
+    # Каждое слово запроса ищется по префиксу; кавычки защищают от синтаксиса FTS
+    tokens = [token.replace('"', '""') for token in text.split()]
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+class PresetStore:
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            try:
+                self.conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS preset_words USING fts5 (words)")
+            except sqlite3.OperationalError:
+                # Сборки SQLite без FTS5
+                self.conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS preset_words USING fts4 (words)")
+
+    def close(self):
+        self.conn.close()
+
+    def _insert(self, name, grid_size, board, marked_cells, source):
+        if source is not None:
+            row = self.conn.execute("SELECT id FROM presets WHERE source = ?", (source,)).fetchone()
+            if row is not None:
+                self._delete(row[0])
+        cursor = self.conn.execute(
+            "INSERT INTO presets (name, source, grid_size, created) VALUES (?, ?, ?, ?)",
+            (name, source, grid_size, time.time())
+        )
+        preset_id = cursor.lastrowid
+        self.conn.executemany(
+            "INSERT INTO cells (preset_id, x, y, text, marked) VALUES (?, ?, ?, ?, ?)",
+            ((preset_id, x, y, board[y][x], (x, y) in marked_cells)
+             for y in range(grid_size) for x in range(grid_size))
+        )
+        words = " ".join(word for row in board for word in row if word)
+        self.conn.execute("INSERT INTO preset_words (rowid, words) VALUES (?, ?)", (preset_id, words))
+        return preset_id
+
+    def _delete(self, preset_id):
+        self.conn.execute("DELETE FROM preset_words WHERE rowid = ?", (preset_id,))
+        self.conn.execute("DELETE FROM presets WHERE id = ?", (preset_id,))
+
+    def add(self, name, grid_size, board, marked_cells, source=None):
+        with self.conn:
+            return self._insert(name, grid_size, board, marked_cells, source)
+
+    def add_many(self, presets):
+        # presets — (name, grid_size, board, marked_cells, source); все в одной транзакции
+        with self.conn:
+            return [self._insert(*preset) for preset in presets]
+
+    def delete(self, preset_id):
+        with self.conn:
+            self._delete(preset_id)
+
+    def get(self, preset_id):
+        row = self.conn.execute("SELECT grid_size FROM presets WHERE id = ?", (preset_id,)).fetchone()
+        if row is None:
+            raise KeyError(preset_id)
+        grid_size = row[0]
+        board = [['' for _ in range(grid_size)] for _ in range(grid_size)]
+        marked_cells = set()
+        for x, y, text, marked in self.conn.execute(
+                "SELECT x, y, text, marked FROM cells WHERE preset_id = ?", (preset_id,)):
+            board[y][x] = text
+            if marked:
+                marked_cells.add((x, y))
+        return grid_size, board, marked_cells
+
+    def search(self, text="", grid_size=None, limit=50) -> List[PresetInfo]:
+        query = fts_query(text)
+        sql = "SELECT p.id, p.name, p.grid_size, w.words FROM presets p JOIN preset_words w ON w.rowid = p.id"
+        conditions = []
+        params = []
+        if query:
+            conditions.append("w.words MATCH ?")
+            params.append(query)
+        if grid_size is not None:
+            conditions.append("p.grid_size = ?")
+            params.append(grid_size)
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY p.created DESC LIMIT ?"
+        params.append(limit)
+        return [PresetInfo(*row) for row in self.conn.execute(sql, params)]
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM presets").fetchone()[0]
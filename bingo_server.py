@@ -0,0 +1,342 @@
+import argparse
+import asyncio
+import json
+import threading
+from collections import deque
+
+from bingo_autosave import apply_record, AutosaveJournal
+from bingo_board import is_cell, parse_preset
+
+# Общее поле для нескольких экранов: сервер держит эталонное состояние и рассылает правки.
+# Протокол — JSON по строке на сообщение поверх TCP. Правки имеют тот же вид, что и записи
+# автосохранения ({"c": [x, y], "t": ...}, {"m": [x, y], "v": ...}, {"s": {...}}) плюс номер "seq".
+# Клиент при подключении шлет {"hello": последний_seq}; если сервер еще помнит правки после него,
+# досылаются они, иначе — полный снимок. {"resync": 1} просит снимок в любой момент.
+
+DEFAULT_PORT = 8765
+HISTORY_SIZE = 1024      # Сколько последних правок сервер помнит для догоняющих клиентов
+CLIENT_BACKLOG = 256     # Очередь отправки клиента; при переполнении клиент получит снимок
+RECONNECT_DELAY = 1.0
+MAX_GRID_SIZE = 100
+
+_RESYNC = object()
+
+
+def encode(message):
+    return (json.dumps(message, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def valid_snapshot(snapshot):
+    if not isinstance(snapshot, dict):
+        return False
+    size = snapshot.get("grid_size")
+    board = snapshot.get("board")
+    marked_cells = snapshot.get("marked_cells")
+    if type(size) is not int or not 1 <= size <= MAX_GRID_SIZE:
+        return False
+    if not isinstance(board, list) or len(board) != size:
+        return False
+    if any(not isinstance(row, list) or len(row) != size or not all(isinstance(word, str) for word in row)
+           for row in board):
+        return False
+    return isinstance(marked_cells, list) and all(is_cell(cell, size) for cell in marked_cells)
+
+
+def valid_record(state, record):
+    # Правка по сети: целое поле, клетка или отметка внутри текущего поля.
+    # Проверяются и типы — правка от любого клиента в сети не должна уронить ведущий экран
+    if not isinstance(record, dict):
+        return False
+    size = state["grid_size"]
+    if "s" in record:
+        return valid_snapshot(record["s"])
+    if "c" in record:
+        return is_cell(record["c"], size) and isinstance(record.get("t"), str)
+    if "m" in record:
+        return is_cell(record["m"], size) and type(record.get("v")) is int and record["v"] in (0, 1)
+    return False
+
+
+class ClientConnection:
+    def __init__(self, server, writer):
+        self.server = server
+        self.writer = writer
+        self.queue = asyncio.Queue(maxsize=CLIENT_BACKLOG)
+        self.resync_pending = False
+        # Живые правки идут клиенту только после hello, иначе они задвоятся с догоняющими из истории
+        self.ready = False
+        self.handler = None
+
+    def send(self, data):
+        if self.resync_pending:
+            return  # Все равно получит снимок
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            self.request_resync()
+
+    def request_resync(self):
+        # Отставшему клиенту вместо очереди правок уйдет один свежий снимок
+        if self.resync_pending:
+            return
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.resync_pending = True
+        self.queue.put_nowait(_RESYNC)
+
+    async def write_loop(self):
+        while True:
+            # Все накопившиеся сообщения уходят одной записью в сокет
+            chunks = [await self.queue.get()]
+            while not self.queue.empty():
+                chunks.append(self.queue.get_nowait())
+            if _RESYNC in chunks:
+                self.resync_pending = False
+                chunks = [self.server.snapshot_bytes()]
+            self.writer.write(b"".join(chunks))
+            await self.writer.drain()
+
+
+class BoardServer:
+    def __init__(self, grid_size, board, marked_cells, host="127.0.0.1", port=DEFAULT_PORT, on_remote=None):
+        self.host = host
+        self.port = port
+        # on_remote(record) — куда отдавать правки клиентов; без него сервер применяет их сам
+        self.on_remote = on_remote
+        self.state = {}
+        apply_record(self.state, AutosaveJournal.snapshot_record(grid_size, board, marked_cells))
+        self.seq = 0
+        self.history = deque(maxlen=HISTORY_SIZE)
+        self.clients = set()
+        self.cached_snapshot = None
+        self.server = None
+        self.loop = None
+        self.thread = None
+
+    def snapshot_bytes(self):
+        if self.cached_snapshot is None or self.cached_snapshot[0] != self.seq:
+            record = AutosaveJournal.snapshot_record(self.state["grid_size"], self.state["board"], self.state["marked_cells"])
+            record["seq"] = self.seq
+            self.cached_snapshot = (self.seq, encode(record))
+        return self.cached_snapshot[1]
+
+    def publish(self, record):
+        # Вызывается в цикле asyncio сервера
+        apply_record(self.state, record)
+        self.seq += 1
+        data = encode(dict(record, seq=self.seq))
+        self.history.append((self.seq, data))
+        for client in self.clients:
+            if client.ready:
+                client.send(data)
+
+    def publish_threadsafe(self, record):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.publish, record)
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            handlers = [client.handler for client in self.clients]
+            for client in self.clients:
+                client.writer.close()
+            await asyncio.gather(*handlers, return_exceptions=True)
+            await self.server.wait_closed()
+
+    def catch_up(self, client, last_seq):
+        client.ready = True
+        if last_seq == self.seq:
+            return
+        if (self.history and isinstance(last_seq, int) and 0 <= last_seq
+                and self.history[0][0] <= last_seq + 1 <= self.seq):
+            for seq, data in self.history:
+                if seq > last_seq:
+                    client.send(data)
+        else:
+            client.request_resync()
+
+    async def handle_client(self, reader, writer):
+        client = ClientConnection(self, writer)
+        client.handler = asyncio.current_task()
+        self.clients.add(client)
+        write_task = asyncio.create_task(client.write_loop())
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(message, dict):
+                    continue
+                if "hello" in message:
+                    self.catch_up(client, message["hello"])
+                elif "resync" in message:
+                    client.request_resync()
+                elif valid_record(self.state, message):
+                    record = {key: message[key] for key in ("s", "c", "t", "m", "v") if key in message}
+                    if self.on_remote is not None:
+                        self.on_remote(record)
+                    else:
+                        self.publish(record)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.clients.discard(client)
+            write_task.cancel()
+            writer.close()
+
+    def run_in_thread(self):
+        # Сервер в фоновом потоке со своим циклом asyncio; возвращает управление, когда порт открыт
+        started = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start())
+            started.set()
+            loop.run_forever()
+            loop.run_until_complete(self.close())
+            loop.close()
+
+        self.thread = threading.Thread(target=run, name="board-server", daemon=True)
+        self.thread.start()
+        started.wait()
+
+    def stop(self):
+        if self.thread is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=2)
+            self.thread = None
+
+
+class BoardClient:
+    # Подключение экрана к серверу; on_record(record) вызывается из фонового потока
+    def __init__(self, host, port, on_record):
+        self.host = host
+        self.port = port
+        self.on_record = on_record
+        self.seq = None
+        self.resyncing = False
+        self.writer = None
+        self.loop = None
+        self.thread = None
+        self.running = False
+
+    async def session(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        self.writer = writer
+        self.resyncing = False
+        writer.write(encode({"hello": self.seq}))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if not isinstance(message, dict):
+                    continue
+                seq = message.pop("seq", None)
+                if "s" in message:
+                    self.resyncing = False
+                elif self.seq is None or self.resyncing:
+                    continue  # Ждем снимок
+                elif seq != self.seq + 1:
+                    # Пропущены правки — просим снимок
+                    self.resyncing = True
+                    writer.write(encode({"resync": 1}))
+                    continue
+                self.seq = seq
+                self.on_record(message)
+        finally:
+            self.writer = None
+            writer.close()
+
+    async def main(self):
+        while self.running:
+            try:
+                await self.session()
+            except (OSError, ValueError):
+                pass
+            if self.running:
+                await asyncio.sleep(RECONNECT_DELAY)
+
+    def send(self, record):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._send, record)
+
+    def _send(self, record):
+        if self.writer is not None:
+            self.writer.write(encode(record))
+
+    def start(self):
+        self.running = True
+        self.loop = asyncio.new_event_loop()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            try:
+                self.loop.run_until_complete(self.main())
+            except asyncio.CancelledError:
+                pass
+            self.loop.close()
+
+        self.thread = threading.Thread(target=run, name="board-client", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.running = False
+
+        def shutdown():
+            for task in asyncio.all_tasks(self.loop):
+                task.cancel()
+
+        self.loop.call_soon_threadsafe(shutdown)
+        self.thread.join(timeout=2)
+        self.thread = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сервер общего поля бинго без окна")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--size", type=int, default=5, help="Размер пустого поля")
+    parser.add_argument("--preset", help="JSON-пресет для начального поля")
+    args = parser.parse_args()
+
+    if args.preset:
+        try:
+            with open(args.preset, "r") as f:
+                grid_size, board, marked_cells = parse_preset(json.load(f))
+        except (OSError, ValueError) as e:
+            raise SystemExit(f"{args.preset}: {e}")
+        if grid_size > MAX_GRID_SIZE:
+            raise SystemExit(f"{args.preset}: поле больше {MAX_GRID_SIZE}x{MAX_GRID_SIZE}")
+    else:
+        grid_size = args.size
+        board = [['' for _ in range(grid_size)] for _ in range(grid_size)]
+        marked_cells = set()
+
+    async def serve():
+        server = BoardServer(grid_size, board, marked_cells, args.host, args.port)
+        await server.start()
+        print(f"Сервер поля {grid_size}x{grid_size} слушает {args.host}:{server.port}")
+        await server.server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
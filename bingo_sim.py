@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple
+
+import numpy as np
+
+from bingo_board import WinDetector, parse_preset
+from bingo_words import WordPool, normalize
+
+# Безоконная симуляция: много карточек против случайных последовательностей вызова слов.
+# Карточка — такое же поле grid_size x grid_size из строк, как BingoGame.board
+
+DEFAULT_POOL_SIZE = 75
+
+
+class SimulationResult(NamedTuple):
+    draws_histogram: np.ndarray   # сколько игр закончилось первой победой на ходу k
+    tie_games: int                # игры, где первыми выиграли сразу несколько карточек
+    win_counts: np.ndarray        # сколько раз карточка была среди первых победителей
+    games: int
+
+    @property
+    def tie_rate(self):
+        return self.tie_games / self.games if self.games else 0.0
+
+    @property
+    def win_probability(self):
+        return self.win_counts / self.games if self.games else self.win_counts.astype(float)
+
+    def mean_draws(self):
+        draws = np.arange(len(self.draws_histogram))
+        return float((draws * self.draws_histogram).sum() / max(1, self.draws_histogram.sum()))
+
+    def percentile_draws(self, q):
+        cumulative = np.cumsum(self.draws_histogram)
+        return int(np.searchsorted(cumulative, q / 100 * cumulative[-1]))
+
+
+
+def generate_cards(pool_size, grid_size, count, rng) -> np.ndarray:
+    # Каждая карточка — grid_size^2 разных слов из пула, в виде индексов
+    cells = grid_size * grid_size
+    if cells > pool_size:
+        raise ValueError(f"В пуле {pool_size} слов, а на карточке {cells} клеток")
+    cards = np.empty((count, cells), dtype=np.int32)
+    chunk = max(1, 2 ** 22 // pool_size)  # чтобы не держать в памяти count x pool_size ключей
+    for start in range(0, count, chunk):
+        keys = rng.random((min(chunk, count - start), pool_size), dtype=np.float32)
+        cards[start:start + chunk] = np.argpartition(keys, cells - 1, axis=1)[:, :cells]
+    return cards
+
+
+def encode_boards(boards: List[List[List[str]]], pool: List[str]) -> np.ndarray:
+    # Каждое слово карточки должно быть в пуле, иначе его никогда не назовут.
+    # Слова сравниваются так же, как в WordPool: без регистра, лишних пробелов и различия «ё»/«е»
+    index = {normalize(word): i for i, word in enumerate(pool)}
+    missing = sorted({word for board in boards for row in board for word in row if normalize(word) not in index})
+    if missing:
+        shown = ", ".join(repr(word) if word.strip() else "пустая клетка" for word in missing[:5])
+        raise ValueError(f"нет в пуле: {shown}" + (f" и еще {len(missing) - 5}" if len(missing) > 5 else ""))
+    return np.array([[index[normalize(word)] for row in board for word in row] for board in boards], dtype=np.int32)
+
+
+def decode_card(card, pool, grid_size) -> List[List[str]]:
+    return [[pool[card[y * grid_size + x]] for x in range(grid_size)] for y in range(grid_size)]
+
+
+def win_times(cells_major, order_rank, lines):
+    # Ход, на котором каждая карточка собирает первую линию.
+    # cells_major[c] — слова клетки c у всех карточек подряд, так каждая операция идет по непрерывному массиву
+    times = [order_rank[cell] for cell in cells_major]
+    best = None
+    for line in lines:
+        line_time = times[line[0]].copy()
+        for cell in line[1:]:
+            np.maximum(line_time, times[cell], out=line_time)
+        if best is None:
+            best = line_time
+        else:
+            np.minimum(best, line_time, out=best)
+    return best
+
+
+def simulate(cards, pool_size, grid_size, games, seed=None) -> SimulationResult:
+    rng = np.random.default_rng(seed)
+    if pool_size < 2 ** 7:
+        rank_dtype = np.int8
+    elif pool_size < 2 ** 15:
+        rank_dtype = np.int16
+    else:
+        rank_dtype = np.int32
+    histogram = np.zeros(pool_size + 1, dtype=np.int64)
+    win_counts = np.zeros(len(cards), dtype=np.int64)
+    tie_games = 0
+    order_rank = np.empty(pool_size, dtype=rank_dtype)
+    draws = np.arange(1, pool_size + 1, dtype=rank_dtype)
+    cells_major = np.ascontiguousarray(cards.T)
+    lines = WinDetector().get_lines(grid_size)
+
+    for _ in range(games):
+        # order_rank[word] — номер хода, на котором слово назовут
+        order_rank[rng.permutation(pool_size)] = draws
+        times = win_times(cells_major, order_rank, lines)
+        first = times.min()
+        winners = np.flatnonzero(times == first)
+        histogram[first] += 1
+        win_counts[winners] += 1
+        if len(winners) > 1:
+            tie_games += 1
+
+    return SimulationResult(histogram, tie_games, win_counts, games)
+
+
+def _simulate_chunk(args):
+    return simulate(*args)
+
+
+def simulate_parallel(cards, pool_size, grid_size, games, workers=None, seed=None) -> SimulationResult:
+    workers = workers or os.cpu_count() or 1
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    chunks = [games // workers + (1 if i < games % workers else 0) for i in range(workers)]
+    jobs = [(cards, pool_size, grid_size, n, s) for n, s in zip(chunks, seeds) if n]
+
+    with ProcessPoolExecutor(max_workers=len(jobs)) as executor:
+        results = list(executor.map(_simulate_chunk, jobs))
+
+    return SimulationResult(
+        sum(r.draws_histogram for r in results),
+        sum(r.tie_games for r in results),
+        sum(r.win_counts for r in results),
+        games,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Симуляция бинго для подбора пула слов и размера поля")
+    parser.add_argument("--pool", help="Файл со словами: .txt по одному на строку или .csv (первый столбец); "
+                                       "по умолчанию числа 1..75")
+    parser.add_argument("--size", type=int, default=5, help="Размер поля")
+    parser.add_argument("--cards", type=int, default=1000, help="Сколько карточек сгенерировать")
+    parser.add_argument("--preset", nargs="*", default=[], help="Пресеты BingoGame, добавляемые к карточкам")
+    parser.add_argument("--games", type=int, default=1000, help="Сколько игр сыграть")
+    parser.add_argument("--workers", type=int, default=1, help="Число процессов (0 — все ядра)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", help="Куда сохранить результаты в JSON")
+    args = parser.parse_args()
+
+    if args.pool:
+        try:
+            pool = WordPool.load(args.pool).words
+        except OSError as e:
+            parser.error(f"не удалось прочитать пул: {e}")
+    else:
+        pool = [str(i) for i in range(1, DEFAULT_POOL_SIZE + 1)]
+    if args.size < 1:
+        parser.error("размер поля должен быть не меньше 1")
+    if args.size * args.size > len(pool):
+        parser.error(f"в пуле {len(pool)} слов, а на карточке {args.size}x{args.size} = {args.size * args.size} клеток")
+
+    rng = np.random.default_rng(args.seed)
+    cards = generate_cards(len(pool), args.size, args.cards, rng)
+    if args.preset:
+        boards = []
+        for path in args.preset:
+            try:
+                with open(path, "r") as f:
+                    grid_size, board, _ = parse_preset(json.load(f))
+            except (OSError, ValueError, TypeError, AttributeError) as e:
+                raise SystemExit(f"{path}: {e}")
+            if grid_size != args.size:
+                raise SystemExit(f"{path}: размер поля {grid_size}, а не {args.size}")
+            boards.append(board)
+        try:
+            cards = np.concatenate([encode_boards(boards, pool), cards])
+        except ValueError as e:
+            raise SystemExit(f"Пресеты не подходят к пулу: {e}")
+
+    if args.workers == 1:
+        result = simulate(cards, len(pool), args.size, args.games, args.seed)
+    else:
+        result = simulate_parallel(cards, len(pool), args.size, args.games, args.workers or None, args.seed)
+
+    print(f"Карточек: {len(cards)}, игр: {result.games}, слов в пуле: {len(pool)}")
+    print(f"Ходов до первой победы: среднее {result.mean_draws():.1f}, "
+          f"медиана {result.percentile_draws(50)}, p95 {result.percentile_draws(95)}")
+    print(f"Доля игр с ничьей: {result.tie_rate:.3f}")
+    print(f"Вероятность победы карточки: от {result.win_probability.min():.4f} до {result.win_probability.max():.4f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "grid_size": args.size,
+                "pool_size": len(pool),
+                "cards": len(cards),
+                "games": result.games,
+                "draws_histogram": result.draws_histogram.tolist(),
+                "tie_rate": result.tie_rate,
+                "win_probability": result.win_probability.tolist(),
+            }, f)
+
+
+if __name__ == "__main__":
+    main()
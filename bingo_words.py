@@ -0,0 +1,73 @@
+import csv
+import random
+from bisect import bisect_left
+from typing import List
+
+# Пул слов и фраз для клеток: дедупликация по нормализованной форме и подсказки по префиксу.
+# Ключи лежат в отсортированном массиве, поиск префикса — двоичный поиск плюс просмотр подряд идущих ключей
+
+SUGGESTION_LIMIT = 6
+
+
+def normalize(text):
+    # Ключ для сравнения: без лишних пробелов, без регистра, «ё» как «е»
+    return " ".join(text.split()).casefold().replace("ё", "е")
+
+
+def read_entries(path, column=0):
+    # Построчное чтение: .csv — значение из столбца column, иначе строка целиком; # — комментарий
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if path.lower().endswith(".csv"):
+            for row in csv.reader(f):
+                if len(row) > column:
+                    yield row[column]
+        else:
+            for line in f:
+                if not line.startswith("#"):
+                    yield line
+
+
+class WordPool:
+    def __init__(self, entries=()):
+        # Из повторов остается первое написание
+        first = {}
+        for entry in entries:
+            word = " ".join(entry.split())
+            if word:
+                first.setdefault(normalize(word), word)
+        self.keys = sorted(first)
+        self.words = [first[key] for key in self.keys]
+        self.longest = max(map(len, self.keys), default=0)
+
+    @classmethod
+    def load(cls, path, column=0):
+        return cls(read_entries(path, column))
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        key = normalize(word)
+        i = bisect_left(self.keys, key)
+        return i < len(self.keys) and self.keys[i] == key
+
+    def suggest(self, prefix, limit=SUGGESTION_LIMIT) -> List[str]:
+        key = normalize(prefix)
+        if not key:
+            return []
+        keys = self.keys
+        i = bisect_left(keys, key)
+        result = []
+        while i < len(keys) and len(result) < limit and keys[i].startswith(key):
+            result.append(self.words[i])
+            i += 1
+        return result
+
+    def sample(self, count, rng=random) -> List[str]:
+        if count > len(self.words):
+            raise ValueError(f"В пуле {len(self.words)} слов, а нужно {count}")
+        return rng.sample(self.words, count)
+
+    def random_board(self, grid_size, rng=random) -> List[List[str]]:
+        words = self.sample(grid_size * grid_size, rng)
+        return [words[y * grid_size:(y + 1) * grid_size] for y in range(grid_size)]
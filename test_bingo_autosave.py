@@ -0,0 +1,87 @@
+import json
+import time
+
+from bingo_autosave import AutosaveJournal
+
+# Журнал автосохранения на настоящих файлах во временной папке
+
+BOARD = [["a", "b", "c"], ["d", "e", "f"], ["g", "h", "i"]]
+TIMEOUT = 5
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + TIMEOUT
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def journal_lines(journal):
+    with open(journal.journal_path, "r", encoding="utf-8") as f:
+        return f.readlines()
+
+
+def test_restore_applies_journal_after_snapshot(tmp_path):
+    journal = AutosaveJournal(str(tmp_path), delay=0)
+    journal.start(3, [row[:] for row in BOARD], {(0, 0)})
+    journal.record_cell(1, 0, "x")
+    journal.record_cell(1, 0, "xy")
+    journal.record_mark(2, 2, True)
+    journal.record_mark(0, 0, False)
+
+    # Поток не остановлен: на диске снимок старта и журнал правок после него
+    restored = AutosaveJournal(str(tmp_path))
+    wait_for(lambda: restored.restore()["marked_cells"] == {(2, 2)})
+    state = restored.restore()
+    assert state["board"][0] == ["a", "xy", "c"]
+    assert journal_lines(journal)
+    journal.stop()
+    assert AutosaveJournal(str(tmp_path)).restore() == state
+
+
+def test_journal_is_compacted_into_snapshot(tmp_path):
+    journal = AutosaveJournal(str(tmp_path), delay=0, compact_every=5)
+    journal.start(3, [row[:] for row in BOARD], set())
+    for k in range(6):
+        journal.record_mark(k % 3, k // 3, True)
+        wait_for(lambda: not journal.pending)
+    wait_for(lambda: journal.journal_records < 5)
+    journal.stop()
+
+    with open(journal.snapshot_path, "r", encoding="utf-8") as f:
+        snapshot = json.load(f)
+    assert len(snapshot["s"]["marked_cells"]) == 6
+    assert journal_lines(journal) == []
+    assert AutosaveJournal(str(tmp_path)).restore()["marked_cells"] == {(x, y) for x in range(3) for y in range(2)}
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    journal = AutosaveJournal(str(tmp_path))
+    journal.start(3, [row[:] for row in BOARD], set())
+    journal.stop()
+    with open(journal.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"c":[0,0],"t":"z"}\n')
+        f.write('{"m":[1,1],"v":1}\n')
+        f.write('{"c":[2,2],"t":"недо')  # Запись оборвалась на середине
+
+    state = AutosaveJournal(str(tmp_path)).restore()
+    assert state["board"][0][0] == "z"
+    assert state["board"][2][2] == "i"
+    assert state["marked_cells"] == {(1, 1)}
+
+
+def test_continuous_edits_are_flushed_after_max_delay(tmp_path):
+    # Правки чаще delay без пауз: запись все равно случается не позже max_delay
+    journal = AutosaveJournal(str(tmp_path), delay=0.3, max_delay=0.5)
+    journal.start(3, [row[:] for row in BOARD], set())
+    try:
+        started = time.monotonic()
+        k = 0
+        while not journal_lines(journal):
+            assert time.monotonic() - started < 1.5
+            journal.record_cell(0, 0, str(k))
+            k += 1
+            time.sleep(0.05)
+        assert time.monotonic() - started >= 0.5
+    finally:
+        journal.stop()
@@ -0,0 +1,78 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from bingo_batch import load_game
+
+# Запуск игры без окна: то, что проходит через BingoGame.__init__
+
+BOARD = [["a", "b", "c"], ["d", "e", "f"], ["g", "h", "i"]]
+
+
+def close(game):
+    game.preset_worker.stop()
+    if game.autosave is not None:
+        game.autosave.stop()
+    if game.board_server is not None:
+        game.board_server.stop()
+
+
+def test_second_launch_restores_autosave(tmp_path, monkeypatch):
+    bingo = load_game()
+    monkeypatch.setattr(bingo, "AUTOSAVE_DIR", str(tmp_path))
+    first = bingo.BingoGame()
+    first.apply_preset(3, [row[:] for row in BOARD], {(0, 0), (1, 1)})
+    close(first)
+
+    second = bingo.BingoGame()
+    try:
+        assert second.board == BOARD
+        assert second.marked_cells == {(0, 0), (1, 1)}
+    finally:
+        close(second)
+
+
+def test_host_starts_from_restored_session(tmp_path, monkeypatch):
+    bingo = load_game()
+    monkeypatch.setattr(bingo, "AUTOSAVE_DIR", str(tmp_path))
+    first = bingo.BingoGame()
+    first.apply_preset(3, [row[:] for row in BOARD], set())
+    close(first)
+
+    host = bingo.BingoGame(host=("127.0.0.1", 0))
+    try:
+        assert host.board_server.state["board"] == BOARD
+    finally:
+        close(host)
+
+
+def test_remote_records_are_checked():
+    bingo = load_game()
+    game = bingo.BingoGame(autosave=False)
+    try:
+        game.apply_preset(3, [row[:] for row in BOARD], set())
+        for record in ({"m": [1.0, 0], "v": 1}, {"c": [1.5, 0], "t": "x"}, {"c": [9, 9], "t": "x"},
+                       {"s": {"grid_size": 3, "board": ["abc", "def", "ghi"], "marked_cells": []}}):
+            game.apply_remote(record)
+        assert game.board == BOARD and game.marked_cells == set()
+        game.apply_remote({"m": [1, 1], "v": 1})
+        assert game.marked_cells == {(1, 1)}
+    finally:
+        close(game)
+
+
+def test_size_change_finishes_editing():
+    bingo = load_game()
+    game = bingo.BingoGame(autosave=False)
+    try:
+        # Клетка на краю 50x50 не должна пережить переход на 3x3
+        game.current_size_index = game.available_sizes.index(50) - 1
+        game.change_grid_size()
+        game.start_editing(49, 49)
+        game.change_grid_size()
+        assert game.editing_cell is None and game.grid_size == 3
+        game.sync_input()
+        game.finish_editing()
+    finally:
+        close(game)
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+
+import bingo_server
+from bingo_server import BoardServer, BoardClient
+
+# Проверка сервера общего поля через loopback: настоящие сокеты, сервер в своем потоке
+
+TIMEOUT = 5
+
+
+def start_server(grid_size=3):
+    board = [['' for _ in range(grid_size)] for _ in range(grid_size)]
+    server = BoardServer(grid_size, board, set(), "127.0.0.1", 0)
+    server.run_in_thread()
+    return server
+
+
+def call_in_loop(server, func, *args):
+    # Выполнить func в цикле сервера и дождаться, пока она отработает
+    done = threading.Event()
+
+    def run():
+        try:
+            func(*args)
+        finally:
+            done.set()
+
+    server.loop.call_soon_threadsafe(run)
+    assert done.wait(TIMEOUT)
+
+
+def publish_cells(server, texts):
+    # Все правки уходят одним вызовом в цикле сервера, между ними клиентам ничего не отправляется
+    call_in_loop(server, lambda: [server.publish({"c": [0, 0], "t": text}) for text in texts])
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + TIMEOUT
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+class RawClient:
+    def __init__(self, port):
+        self.sock = socket.create_connection(("127.0.0.1", port), timeout=TIMEOUT)
+        self.file = self.sock.makefile("rb")
+
+    def send(self, message):
+        self.sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+    def read(self):
+        return json.loads(self.file.readline())
+
+    def read_nothing(self, wait=0.2):
+        self.sock.settimeout(wait)
+        try:
+            return self.sock.recv(1) == b""
+        except socket.timeout:
+            return True
+        finally:
+            self.sock.settimeout(TIMEOUT)
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+def test_deltas_arrive_in_order():
+    server = start_server()
+    client = RawClient(server.port)
+    try:
+        client.send({"hello": None})
+        snapshot = client.read()
+        assert snapshot["seq"] == 0 and snapshot["s"]["grid_size"] == 3
+
+        texts = [f"слово {k}" for k in range(50)]
+        publish_cells(server, texts)
+        call_in_loop(server, server.publish, {"m": [1, 1], "v": 1})
+        received = [client.read() for _ in range(51)]
+        assert [message["seq"] for message in received] == list(range(1, 52))
+        assert [message["t"] for message in received[:50]] == texts
+        assert received[50] == {"m": [1, 1], "v": 1, "seq": 51}
+    finally:
+        client.close()
+        server.stop()
+
+
+def test_hello_races_with_publish():
+    # Клиент подключен, но hello еще не обработан: правки за это время приходят один раз и по порядку
+    server = start_server()
+    client = RawClient(server.port)
+    try:
+        wait_for(lambda: server.clients)
+        publish_cells(server, ["a", "b"])
+        client.send({"hello": 0})
+        assert [client.read()["seq"] for _ in range(2)] == [1, 2]
+        publish_cells(server, ["c"])
+        assert client.read()["seq"] == 3
+        assert client.read_nothing()
+    finally:
+        client.close()
+        server.stop()
+
+
+def test_lagging_client_gets_snapshot(monkeypatch):
+    monkeypatch.setattr(bingo_server, "CLIENT_BACKLOG", 4)
+    server = start_server()
+    client = RawClient(server.port)
+    try:
+        client.send({"hello": None})
+        assert client.read()["seq"] == 0
+        # Очередь клиента переполняется раньше, чем цикл успевает что-то отправить
+        publish_cells(server, [str(k) for k in range(20)])
+        message = client.read()
+        assert message["seq"] == 20
+        assert message["s"]["board"][0][0] == "19"
+        assert client.read_nothing()
+    finally:
+        client.close()
+        server.stop()
+
+
+def test_client_catches_up_after_reconnect(monkeypatch):
+    monkeypatch.setattr(bingo_server, "RECONNECT_DELAY", 0.05)
+    server = start_server()
+    received = []
+    client = BoardClient("127.0.0.1", server.port, received.append)
+    client.start()
+    try:
+        wait_for(lambda: client.seq == 0)
+        publish_cells(server, ["a", "b"])
+        wait_for(lambda: client.seq == 2)
+
+        def drop_and_publish():
+            # Сервер рвет соединение, и пока клиента нет, поле меняется
+            for connection in list(server.clients):
+                connection.writer.close()
+            server.publish({"c": [1, 0], "t": "c"})
+            server.publish({"m": [2, 2], "v": 1})
+
+        call_in_loop(server, drop_and_publish)
+        wait_for(lambda: client.seq == 4)
+        # После переподключения пришли только пропущенные правки, без нового снимка
+        assert [message for message in received if "s" in message] == received[:1]
+        assert received[1:] == [{"c": [0, 0], "t": "a"}, {"c": [0, 0], "t": "b"},
+                                {"c": [1, 0], "t": "c"}, {"m": [2, 2], "v": 1}]
+    finally:
+        client.stop()
+        server.stop()
+
+
+def test_client_skips_messages_that_are_not_objects(monkeypatch):
+    monkeypatch.setattr(bingo_server, "RECONNECT_DELAY", 0.05)
+    snapshot = {"s": {"grid_size": 1, "board": [["x"]], "marked_cells": []}, "seq": 0}
+    lines = [b"[1, 2]\n", b"5\n", b'"text"\n', json.dumps(snapshot).encode("utf-8") + b"\n"]
+
+    async def handle(reader, writer):
+        await reader.readline()
+        writer.write(b"".join(lines))
+        await writer.drain()
+
+    loop = asyncio.new_event_loop()
+    fake = loop.run_until_complete(asyncio.start_server(handle, "127.0.0.1", 0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    received = []
+    client = BoardClient("127.0.0.1", fake.sockets[0].getsockname()[1], received.append)
+    client.start()
+    try:
+        wait_for(lambda: received)
+        assert received[0] == {"s": snapshot["s"]}
+        assert client.thread.is_alive()
+    finally:
+        client.stop()
+        loop.call_soon_threadsafe(fake.close)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(TIMEOUT)
+
+
+def test_malformed_records_are_rejected():
+    state = {"grid_size": 3}
+    board = [["", "", ""], ["", "", ""], ["", "", ""]]
+    bad = [
+        {"m": [1.0, 0], "v": 1},
+        {"m": [True, 0], "v": 1},
+        {"m": [1, 0], "v": 1.0},
+        {"m": [1, 0, 0], "v": 1},
+        {"m": [3, 0], "v": 1},
+        {"c": [1.5, 0], "t": "x"},
+        {"c": [1, 0], "t": 5},
+        {"c": "ab", "t": "x"},
+        {"s": {"grid_size": 3, "board": ["abc", "def", "ghi"], "marked_cells": []}},
+        {"s": {"grid_size": 3, "board": board, "marked_cells": [[0.0, 1]]}},
+        {"s": {"grid_size": 3.0, "board": board, "marked_cells": []}},
+        {"s": [3]},
+        {"x": 1},
+    ]
+    for record in bad:
+        assert not bingo_server.valid_record(state, record), record
+    assert bingo_server.valid_record(state, {"m": [2, 0], "v": 0})
+    assert bingo_server.valid_record(state, {"c": [0, 2], "t": "слово"})
+    assert bingo_server.valid_record(state, {"s": {"grid_size": 3, "board": board, "marked_cells": [[0, 1]]}})
+
+
+def test_server_ignores_malformed_records():
+    server = start_server()
+    client = RawClient(server.port)
+    try:
+        client.send({"hello": None})
+        assert client.read()["seq"] == 0
+        client.send({"m": [1.0, 0], "v": 1})
+        client.send({"c": [1.5, 0], "t": "x"})
+        client.send({"m": [1, 0], "v": 1})
+        assert client.read() == {"m": [1, 0], "v": 1, "seq": 1}
+        assert server.state["marked_cells"] == {(1, 0)}
+    finally:
+        client.close()
+        server.stop()